@@ -0,0 +1,35 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend
+from catalogue.filter import Comparison, Attribute
+
+from bench_common import generate_events, timed, missions
+
+from collections import Counter
+
+import random
+
+
+if __name__ == "__main__":
+    count = 200000
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, mission=lambda: random.choice(missions),
+                                          priority=lambda: random.randint(0, 9)))
+    backend.commit()
+
+    catalogue = Catalogue('high priority', 'Patrick', predicate=Comparison('>=', Attribute('priority'), 5))
+
+    events, t_load = timed(lambda: backend.get_events(catalogue))
+    n, t_count = timed(lambda: backend.count_events(catalogue))
+    extent, t_extent = timed(lambda: backend.time_extent(catalogue))
+    counts, t_counts = timed(lambda: backend.attribute_value_counts(catalogue, 'mission'))
+
+    assert n == len(events)
+    assert extent == (min(e.start for e in events), max(e.end for e in events))
+    assert dict(counts) == Counter(e.mission for e in events)
+
+    print(f'{count} events, {n} in the smart catalogue')
+    print(f'get_events()               {t_load * 1e3:>9.1f}ms')
+    print(f'count_events()             {t_count * 1e3:>9.1f}ms')
+    print(f'time_extent()              {t_extent * 1e3:>9.1f}ms')
+    print(f'attribute_value_counts()   {t_counts * 1e3:>9.1f}ms')
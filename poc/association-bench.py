@@ -0,0 +1,39 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend
+
+from bench_common import generate_events, timed
+
+import random
+
+import catalogue.api as api
+
+
+if __name__ == "__main__":
+    count = 200000
+    catalogue_count = 50
+    catalogue_size = 2000
+    lookups = 5000
+
+    backend = _Backend('sqlite://')
+    events = generate_events(count, priority=lambda: random.randint(0, 9))
+    backend.insert_events(events)
+    backend.commit()
+
+    catalogues = [Catalogue(f'catalogue {i}', 'Patrick') for i in range(catalogue_count)]
+    for c in catalogues:
+        c.add_events(random.sample(events, catalogue_size))
+    api.save(catalogues, backend)
+
+    _, t_events = timed(lambda: backend.get_events(catalogues[0]))
+
+    # the catalogues column of a table view of events
+    shown = random.sample(events, lookups)
+    one_by_one, t_loop = timed(lambda: {e.uuid: backend.get_catalogues(e) for e in shown})
+    batched, t_batched = timed(lambda: backend.get_catalogues(events=shown))
+    assert {u: sorted(c.name for c in cs) for u, cs in one_by_one.items()} == \
+           {u: sorted(c.name for c in cs) for u, cs in batched.items()}
+
+    print(f'{count} events, {catalogue_count} catalogues of {catalogue_size} events')
+    print(f'get_events(catalogue)                  {t_events * 1e3:>9.1f}ms')
+    print(f'get_catalogues(event) for {lookups} events  {t_loop * 1e3:>9.1f}ms')
+    print(f'get_catalogues(events=...)             {t_batched * 1e3:>9.1f}ms')
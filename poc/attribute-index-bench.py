@@ -0,0 +1,65 @@
+from catalogue.orm import _Backend, PredicateVisitor, orm
+from catalogue.filter import Comparison, Attribute, All
+
+from bench_common import generate_events, missions
+
+from sqlalchemy import and_
+
+import random
+import time
+
+
+def exists_condition(predicate):
+    """The correlated EXISTS generated before the typed indexes, for comparison."""
+    if isinstance(predicate, All):
+        return and_(*[exists_condition(p) for p in predicate._predicates])
+    attribute_class = orm.Event._attribute_class
+    return orm.Event.attributes.any(
+        and_(attribute_class.key == predicate._lhs.value,
+             {'==': attribute_class.value.__eq__,
+              '<': attribute_class.value.__lt__}[predicate._op](predicate._rhs)))
+
+
+def timed_count(backend, condition, repeat=5):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        n = backend.session.query(orm.Event.id).filter(condition).count()
+    return n, (time.perf_counter() - t0) / repeat
+
+
+if __name__ == "__main__":
+    count = 250000  # 4 attributes each: 1M attribute rows
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, mission=lambda: random.choice(missions),
+                                          priority=lambda: random.randint(0, 999),
+                                          quality=random.random,
+                                          validated=lambda: random.random() < 0.1))
+    backend.commit()
+
+    indexes = list(orm.EventAttributes.__table__.indexes)
+
+    predicates = {
+        'mission == mms2': Comparison('==', Attribute('mission'), 'mms2'),
+        'priority == 42': Comparison('==', Attribute('priority'), 42),
+        'quality < 0.01': Comparison('<', Attribute('quality'), 0.01),
+        'validated and priority < 10': All(Comparison('==', Attribute('validated'), True),
+                                           Comparison('<', Attribute('priority'), 10)),
+    }
+
+    print(f'{count * 4} attribute rows')
+    print(f"{'predicate':>28} | {'matches':>7} | {'EXISTS, no index':>16} | {'IN, typed index':>15}")
+
+    for name, predicate in predicates.items():
+        with backend.engine.begin() as connection:
+            for index in indexes:
+                index.drop(connection, checkfirst=True)
+        n_before, t_before = timed_count(backend, exists_condition(predicate))
+
+        with backend.engine.begin() as connection:
+            for index in indexes:
+                index.create(connection, checkfirst=True)
+        n_after, t_after = timed_count(backend, PredicateVisitor(orm.Event).visit_predicate(predicate))
+
+        assert n_before == n_after
+        print(f'{name:>28} | {n_after:>7} | {t_before * 1e3:>14.2f}ms | {t_after * 1e3:>13.2f}ms')
@@ -0,0 +1,56 @@
+from catalogue.orm import _Backend
+
+from bench_common import generate_events, missions, random_datetime
+
+import gc
+import random
+import time
+import tracemalloc
+
+
+def retained(f):
+    """Result of f, the memory it retains and the duration of f (untraced)."""
+    t0 = time.perf_counter()
+    f()
+    t = time.perf_counter() - t0
+
+    gc.collect()
+    tracemalloc.start()
+    result = f()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, t
+
+
+if __name__ == "__main__":
+    count = 100000
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, ['Patrick', 'Alexis'],
+                                          mission=lambda: random.choice(missions),
+                                          priority=lambda: random.randint(0, 999),
+                                          quality=random.random,
+                                          created=random_datetime))
+    backend.commit()
+
+    def get_events():
+        backend.session.expunge_all()  # entities of a previous call would not be counted
+        return backend.get_events()
+
+    events, events_size, t_events = retained(get_events)
+    backend.session.expunge_all()
+    events.clear()
+
+    batch, batch_size, t_batch = retained(lambda: backend.get_event_batch())
+
+    by_id = {b._backend_id: b for b in batch}
+    for e in backend.get_events():
+        b = by_id[e._backend_id]
+        assert b.__dict__.keys() == e.__dict__.keys() - {'_backend_entity'}
+        assert all(b.__dict__[k] == e.__dict__[k] for k in ['start', 'end', 'author', 'uuid', 'mission',
+                                                            'priority', 'quality', 'created'])
+
+    print(f'{count} events with 4 attributes')
+    print(f'get_events()       {events_size / count:>7.0f} bytes/event {t_events * 1e3:>8.1f}ms')
+    print(f'get_event_batch()  {batch_size / count:>7.0f} bytes/event {t_batch * 1e3:>8.1f}ms')
@@ -0,0 +1,36 @@
+from catalogue import Event
+
+import random
+import time
+import datetime as dt
+
+from typing import Callable, List, Sequence
+
+missions = ['mms1', 'mms2', 'mms3', 'mms4', 'cluster1', 'cluster2', 'themis', 'wind']
+
+
+def random_datetime() -> dt.datetime:
+    """Between 1970 and 2038."""
+    return dt.datetime.fromtimestamp(random.randint(0, 2 ** 31))
+
+
+def generate_events(count: int, authors: Sequence[str] = ('Patrick',), duration: Callable[[], dt.timedelta] = None,
+                    **attributes: Callable[[], object]) -> List[Event]:
+    """count events starting at random times between 1970 and 2038 by one of authors, lasting an hour or what
+    duration returns. attributes are the functions returning the value of each attribute, an event does not have
+    the attribute if it returns None."""
+    events = []
+    for _ in range(count):
+        start = random_datetime()
+        end = start + (duration() if duration else dt.timedelta(hours=1))
+        values = {key: f() for key, f in attributes.items()}
+        events += [Event(start, end, random.choice(authors), **{k: v for k, v in values.items() if v is not None})]
+    return events
+
+
+def timed(f, repeat: int = 1):
+    """Result of f and its duration, averaged over repeat calls."""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = f()
+    return result, (time.perf_counter() - t0) / repeat
@@ -0,0 +1,66 @@
+from catalogue import Event, Catalogue, api
+
+from bench_common import missions
+
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import datetime as dt
+
+
+def write_csv(path: str, count: int):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['start', 'end', 'author', 'mission', 'priority', 'quality', 'created'])
+        for _ in range(count):
+            start = dt.datetime.fromtimestamp(random.randint(0, 2 ** 31))
+            writer.writerow([start.isoformat(), (start + dt.timedelta(hours=1)).isoformat(),
+                             random.choice(['Patrick', 'Alexis']), random.choice(missions), random.randint(0, 999),
+                             random.random(), (start + dt.timedelta(days=random.randint(0, 100))).isoformat()])
+
+
+def event_per_row(path: str, backend):
+    """An Event per row (its keys checked per event) and save() of all of them with the catalogue."""
+    events = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            events += [Event(dt.datetime.fromisoformat(row.pop('start')), dt.datetime.fromisoformat(row.pop('end')),
+                             row.pop('author'), mission=row['mission'], priority=int(row['priority']),
+                             quality=float(row['quality']), created=dt.datetime.fromisoformat(row['created']))]
+    api.save([Catalogue('imported', 'Patrick', events=events)], backend=backend)
+
+
+def streamed(path: str, backend):
+    api.import_events(path, 'imported', 'Patrick', backend=backend)
+
+
+def measure(f, path: str):
+    """Duration and peak of Python memory of f importing path into a new database."""
+    with tempfile.TemporaryDirectory() as directory:
+        backend = api.open_backend(f'sqlite:///{directory}/bench.sqlite')
+
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        f(path, backend)
+        t = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert api.count_events(backend=backend) == count
+        backend.engine.dispose()
+    return t, peak
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'events.csv')
+
+        print(f'{"":>8} | {"Event per row + save()":>24} | {"import_events()":>24}   (traced)')
+        for count in [50000, 200000]:
+            write_csv(path, count)
+            (t_row, peak_row), (t, peak) = measure(event_per_row, path), measure(streamed, path)
+            print(f'{count:>8} | {t_row:>7.1f}s {peak_row / 2 ** 20:>9.1f} MiB peak | '
+                  f'{t:>7.1f}s {peak / 2 ** 20:>9.1f} MiB peak')
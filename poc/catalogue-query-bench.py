@@ -0,0 +1,47 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend
+from catalogue.filter import Comparison, Attribute, All, AnyEvent
+from catalogue.evaluator import compile_predicate
+
+from bench_common import generate_events, timed, missions
+
+import random
+
+import catalogue.api as api
+
+
+if __name__ == "__main__":
+    count = 5000
+
+    backend = _Backend('sqlite://')
+    events = generate_events(20 * count, mission=lambda: random.choice(missions))
+    backend.insert_events(events)
+    backend.commit()
+
+    catalogues = []
+    for i in range(count):
+        c = Catalogue(f'catalogue {i}', random.choice(['Patrick', 'Alexis']),
+                      level=random.randint(0, 99), kind=random.choice(['storm', 'wave', 'shock']))
+        c.add_events(random.sample(events, 10))
+        catalogues += [c]
+    api.save(catalogues, backend)
+
+    by_attributes = All(Comparison('==', Attribute('kind'), 'storm'), Comparison('>=', Attribute('level'), 90))
+    f = compile_predicate(by_attributes)
+    python, t_python = timed(lambda: [c for c in backend.get_catalogues() if f(c)])
+    sql, t_sql = timed(lambda: backend.get_catalogues(by_attributes))
+    assert {c.name for c in python} == {c.name for c in sql}
+
+    # catalogues having an event of one of the rarer missions, in Python the events of every catalogue are loaded
+    by_events = AnyEvent(Comparison('==', Attribute('mission'), 'themis'))
+    g = compile_predicate(by_events._operand)
+    python_events, t_python_events = timed(lambda: [c for c in backend.get_catalogues()
+                                                    if any(g(e) for e in backend.get_events(c))])
+    sql_events, t_sql_events = timed(lambda: backend.get_catalogues(by_events))
+    assert {c.name for c in python_events} == {c.name for c in sql_events}
+
+    print(f'{count} catalogues of 10 events')
+    print(f'attributes, in Python       {t_python * 1e3:>9.1f}ms')
+    print(f'attributes, in SQL          {t_sql * 1e3:>9.1f}ms')
+    print(f'AnyEvent, in Python         {t_python_events * 1e3:>9.1f}ms')
+    print(f'AnyEvent, in SQL            {t_sql_events * 1e3:>9.1f}ms')
@@ -6,6 +6,7 @@ from typing import Dict, List, Union
 from uuid import uuid4
 
 from .filter import Predicate
+from .serialization import decode_predicate
 
 _valid_key = re.compile(r'^[A-Za-z][A-Za-z_0-9]*$')
 
@@ -21,13 +22,42 @@ def _create_attributes(inst: object, kwargs: Dict) -> None:
     for k, v in kwargs.items():
         if _valid_key.match(k):
             inst.__dict__[k] = v
+            inst._dirty.add(k)
         else:
             raise ValueError('Invalid key-name for event-meta-data in kwargs:', k)
 
 
 class _BackendBasedEntity:
+    """Records the fields and attributes set or deleted since the instance was last loaded or saved (in
+    _dirty), saving a persisted instance then only writes those."""
+
+    def __init__(self):
+        self.__dict__['_dirty'] = set()
+
+    def __setattr__(self, key, value):
+        self.__dict__[key] = value
+        if _valid_key.match(key):
+            self._dirty.add(key)
+
+    def __delattr__(self, key):
+        if key in self._fixed_keys:
+            raise AttributeError(f'{key} cannot be deleted.')
+        super().__delattr__(key)
+        if _valid_key.match(key):
+            self._dirty.add(key)
+
+    def is_modified(self) -> bool:
+        return bool(self._dirty)
+
+    def _mark_clean(self, keys=None):
+        """Forget the modification of keys (of all if None), called once they are in the database."""
+        if keys is None:
+            self._dirty.clear()
+        else:
+            self._dirty.difference_update(keys)
+
     def representation(self, name: str) -> str:
-        fix = ', '.join(k + '=' + str(self.__dict__[k]) for k in self._fixed_keys)
+        fix = ', '.join(k + '=' + str(getattr(self, k)) for k in self._fixed_keys)
         kv = ', '.join(k + '=' + str(v) for k, v in self.variable_attributes_as_dict().items())
         return f'{name}({fix}) attributes({kv})'
 
@@ -76,19 +106,43 @@ class Catalogue(_BackendBasedEntity):
         self.author = author
         self.predicate = predicate
 
+        # membership changes not yet saved, by uuid, the last change of an event wins
+        self._added_events = {}  # type: Dict[str, Event]
+        self._removed_events = {}  # type: Dict[str, Event]
         if events:
-            self._added_events = events
-        else:
-            self._added_events = []
-        self._removed_events = []
+            self.add_events(events)
 
         _create_attributes(self, kwargs)
 
     def add_events(self, events: Union[Event, List[Event]]):
-        self._added_events += _listify(events)
+        for e in _listify(events):
+            self._removed_events.pop(e.uuid, None)
+            self._added_events[e.uuid] = e
 
     def remove_events(self, events: Union[Event, List[Event]]):
-        self._removed_events += _listify(events)
+        for e in _listify(events):
+            self._added_events.pop(e.uuid, None)
+            self._removed_events[e.uuid] = e
+
+    def __getattr__(self, key):
+        # the predicate of a loaded catalogue is decoded on first access
+        if key == 'predicate' and '_encoded_predicate' in self.__dict__:
+            self.__dict__['predicate'] = decode_predicate(self.__dict__.pop('_encoded_predicate'))
+            return self.__dict__['predicate']
+        raise AttributeError(f"'Catalogue' object has no attribute '{key}'")
+
+    def _set_encoded_predicate(self, data: bytes):
+        """Predicate as stored (see catalogue.serialization), decoded when accessed."""
+        del self.__dict__['predicate']
+        self.__dict__['_encoded_predicate'] = data
+
+    def is_modified(self) -> bool:
+        return super().is_modified() or bool(self._added_events or self._removed_events)
+
+    def _mark_clean(self, keys=None):
+        super()._mark_clean(keys)
+        self._added_events = {}
+        self._removed_events = {}
 
     def __repr__(self):
         return self.representation('Catalogue')
@@ -0,0 +1,106 @@
+from . import Event, Catalogue, _listify
+from .filter import Predicate
+from .importer import read_events
+from .api import _default_url
+
+import threading
+
+import datetime as dt
+
+from typing import Union, List, AsyncIterator, Sequence, Optional, Tuple, Dict
+
+# as in catalogue.api, the backend is only imported and created on first use
+_url = None
+_fulltext_index = False
+_default = None
+_lock = threading.Lock()
+
+
+def open_backend(url: str, fulltext_index: bool = False):
+    """Asynchronous backend on the SQLAlchemy-URL url with an asyncio-driver (e.g. sqlite+aiosqlite:///...),
+    to be passed as backend to the functions of this module. See catalogue.api.open_backend() for fulltext_index."""
+    from .orm.aio import _AsyncBackend
+    return _AsyncBackend(url, fulltext_index)
+
+
+def use(url: str, fulltext_index: bool = False) -> None:
+    """Sets the URL of the default backend, by default ~/.space-event-catalogue.sqlite with aiosqlite. The previous
+    default backend is not closed (disposing an asynchronous engine has to be awaited), await
+    backend.engine.dispose() of it if it was used."""
+    global _url, _fulltext_index, _default
+    with _lock:
+        _url, _fulltext_index, _default = url, fulltext_index, None
+
+
+def _backend(backend=None):
+    global _default
+    if backend is not None:
+        return backend
+
+    if _default is None:
+        with _lock:
+            if _default is None:
+                _default = open_backend(_url or _default_url('sqlite+aiosqlite'), _fulltext_index)
+    return _default
+
+
+async def get_catalogues(base: Union[Event, Predicate] = None,
+                         limit: int = None, after: str = None, order_by: Sequence[str] = ('name', 'id'),
+                         events: List[Event] = None,
+                         backend=None) -> Union[List[Catalogue], Dict[str, List[Catalogue]]]:
+    """See catalogue.api.get_catalogues()."""
+    return await _backend(backend).get_catalogues(base, limit, after, order_by, events)
+
+
+async def get_events(base: Union[Catalogue, Predicate] = None,
+                     limit: int = None, after: str = None, order_by: Sequence[str] = ('start', 'id'),
+                     backend=None) -> List[Event]:
+    """See catalogue.api.get_events()."""
+    return await _backend(backend).get_events(base, limit, after, order_by)
+
+
+def iter_events(base: Catalogue = None, chunk_size: int = 1000, backend=None) -> AsyncIterator[Event]:
+    """Asynchronous iterator over the events of base, fetched chunk-wise: async for event in iter_events(...)"""
+    return _backend(backend).iter_events(base, chunk_size)
+
+
+async def count_events(base: Union[Catalogue, Predicate] = None, backend=None) -> int:
+    return await _backend(backend).count_events(base)
+
+
+async def time_extent(base: Union[Catalogue, Predicate] = None,
+                      backend=None) -> Optional[Tuple[dt.datetime, dt.datetime]]:
+    return await _backend(backend).time_extent(base)
+
+
+async def attribute_value_counts(base: Union[Catalogue, Predicate], key: str,
+                                 backend=None) -> List[Tuple[object, int]]:
+    """See catalogue.api.attribute_value_counts()."""
+    return await _backend(backend).attribute_value_counts(base, key)
+
+
+async def import_events(path: str, catalogue: str, author: str, names: Dict[str, Optional[str]] = None,
+                        format: str = None, chunk_size: int = 10000, backend=None) -> int:
+    """See catalogue.api.import_events(), the file is read in a thread."""
+    return await _backend(backend).import_events(read_events(path, author, names, format, chunk_size), catalogue,
+                                                 author)
+
+
+async def save(instances: List[Union[Event, Catalogue]], backend=None) -> None:
+    events = []
+    catalogues = []
+
+    for instance in _listify(instances):
+        if isinstance(instance, Event):
+            events += [instance]
+        elif isinstance(instance, Catalogue):
+            catalogues += [instance]
+        else:
+            raise ValueError('Can only create or update Events or Catalogues.')
+
+    await _backend(backend).save(events, catalogues)
+
+
+async def rebuild_fulltext_index(backend=None) -> None:
+    """See catalogue.api.rebuild_fulltext_index()."""
+    await _backend(backend).rebuild_fulltext_index()
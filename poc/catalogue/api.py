@@ -1,24 +1,166 @@
 from . import Event, Catalogue, _listify
 from .filter import Predicate
-from .orm import backend
+from .importer import read_events
 
-from typing import Union, List
+from pathlib import Path
 
+import threading
 
-def get_catalogues(base: Union[Event, Predicate] = None) -> List[Catalogue]:
-    return backend.get_catalogues(base)
+import datetime as dt
 
+from typing import Union, List, Iterator, Sequence, Optional, Tuple, Dict
 
-def get_events(base: Union[Catalogue, Predicate] = None) -> List[Event]:
-    return backend.get_events(base)
+# the backend (and SQLAlchemy) is only imported and created on first use, see _backend()
+_url = None
+_fulltext_index = False
+_default = None
+_lock = threading.Lock()
 
 
-def save(instances: List[Union[Event, Catalogue]]) -> None:
+def _default_url(driver: str = 'sqlite') -> str:
+    return f'{driver}:///' + str(Path.joinpath(Path.home(), '.space-event-catalogue.sqlite'))
+
+
+def open_backend(url: str, fulltext_index: bool = False):
+    """Opens the catalogue-database at the SQLAlchemy-URL url (created if needed), independently of the default
+    backend, to be passed as backend to the functions of this module. fulltext_index creates the full-text indexes
+    answering Search (SQLite only), at the cost of slower inserts."""
+    from .orm import _Backend
+    return _Backend(url, fulltext_index)
+
+
+def use(url: str, fulltext_index: bool = False) -> None:
+    """Sets the URL of the default backend, by default ~/.space-event-catalogue.sqlite, and whether it creates the
+    full-text indexes (see open_backend()). The default backend is opened on the next call, the connections of the
+    previous one are closed."""
+    global _url, _fulltext_index, _default
+    with _lock:
+        if _default is not None:
+            _default.engine.dispose()
+        _url, _fulltext_index, _default = url, fulltext_index, None
+
+
+def _backend(backend=None):
+    global _default
+    if backend is not None:
+        return backend
+
+    if _default is None:
+        with _lock:
+            if _default is None:
+                _default = open_backend(_url or _default_url(), _fulltext_index)
+    return _default
+
+
+def get_catalogues(base: Union[Event, Predicate] = None,
+                   limit: int = None, after: str = None, order_by: Sequence[str] = ('name', 'id'),
+                   events: List[Event] = None,
+                   backend=None) -> Union[List[Catalogue], Dict[str, List[Catalogue]]]:
+    """Catalogues of base, paginated if limit or after are given (see get_events()). base is an Event (the
+    catalogues containing it) or a Predicate on name, author and attributes - on their events with AnyEvent.
+
+    With events (instead of base) the catalogues of each of the events are looked up at once, returned as
+    {event uuid: catalogues}."""
+    return _backend(backend).get_catalogues(base, limit, after, order_by, events)
+
+
+def get_events(base: Union[Catalogue, Predicate] = None,
+               limit: int = None, after: str = None, order_by: Sequence[str] = ('start', 'id'),
+               backend=None) -> List[Event]:
+    """Events of base. With limit or after, a Page of at most limit events ordered by order_by is returned,
+    page.cursor is passed as after to get the next one:
+
+        page = get_events(catalogue, limit=500)
+        while page.cursor:
+            page = get_events(catalogue, limit=500, after=page.cursor)
+    """
+    return _backend(backend).get_events(base, limit, after, order_by)
+
+
+def iter_events(base: Catalogue = None, chunk_size: int = 1000, backend=None) -> Iterator[Event]:
+    """Iterator over the events of base, fetched chunk_size at a time from the database: memory does not grow with
+    the number of events, as long as the iterated ones are not kept."""
+    return _backend(backend).iter_events(base, chunk_size)
+
+
+def get_columns(base: Catalogue = None, backend=None):
+    """Columnar snapshot of the events of base for vectorized evaluation of predicates, requires numpy."""
+    return _backend(backend).get_columns(base)
+
+
+def get_event_batch(base: Union[Catalogue, Predicate] = None, backend=None):
+    """The events of base in compact storage (EventBatch) for large results, Event-objects are created on indexing."""
+    return _backend(backend).get_event_batch(base)
+
+
+def count_events(base: Union[Catalogue, Predicate] = None, backend=None) -> int:
+    """Number of events of base, counted by the database without loading them."""
+    return _backend(backend).count_events(base)
+
+
+def time_extent(base: Union[Catalogue, Predicate] = None, backend=None) -> Optional[Tuple[dt.datetime, dt.datetime]]:
+    """Earliest start and latest end of the events of base, None if there are none."""
+    return _backend(backend).time_extent(base)
+
+
+def attribute_value_counts(base: Union[Catalogue, Predicate], key: str, backend=None) -> List[Tuple[object, int]]:
+    """(value, number of events) for each value of attribute key among the events of base, most frequent first."""
+    return _backend(backend).attribute_value_counts(base, key)
+
+
+def materialize(catalogue: Catalogue, backend=None) -> None:
+    """Keep the results of a smart catalogue materialized, updated by save(), for fast repeated get_events()."""
+    _backend(backend).materialize(catalogue)
+
+
+def dematerialize(catalogue: Catalogue, backend=None) -> None:
+    _backend(backend).dematerialize(catalogue)
+
+
+def rebuild_fulltext_index(backend=None) -> None:
+    """Re-indexes the full-text indexes, needed after a VACUUM of the database (which may renumber the rows they
+    refer to). Nothing to do without full-text indexes."""
+    _backend(backend).rebuild_fulltext_index()
+
+
+def import_events(path: str, catalogue: str, author: str, names: Dict[str, Optional[str]] = None,
+                  format: str = None, chunk_size: int = 10000, backend=None) -> int:
+    """Streams the events of a CSV-, VOTable- or Parquet-file into the catalogue named catalogue (created by author
+    if there is none), in a transaction per chunk of chunk_size events and without creating Event-objects: memory
+    does not grow with the size of the file, except for VOTables. See catalogue.importer.read_events() for the
+    mapping and the types of the columns, returns the number of imported events. An event of a uuid already stored
+    (a file with a uuid-column imported again) is added to the catalogue as it is stored, not duplicated."""
+    return _backend(backend).import_events(read_events(path, author, names, format, chunk_size), catalogue, author)
+
+
+def save(instances: List[Union[Event, Catalogue]], backend=None) -> None:
+    backend = _backend(backend)
+
+    events = {}  # keyed by id() to skip duplicates
+    catalogues = []
+
     for instance in _listify(instances):
         if isinstance(instance, Event):
-            backend.save_event(instance)
+            events[id(instance)] = instance
         elif isinstance(instance, Catalogue):
-            backend.save_catalogue(instance)
+            catalogues += [instance]
         else:
             raise ValueError('Can only create or update Events or Catalogues.')
+
+    try:
+        new_events = []  # never persisted events go through the bulk insert path
+        for event in events.values():
+            if backend.is_persisted(event):
+                backend.save_event(event)
+            else:
+                new_events += [event]
+        backend.insert_events(new_events)
+
+        # catalogues last, their events may have been inserted just before
+        for catalogue in catalogues:
+            backend.save_catalogue(catalogue)
+    except Exception:
+        backend.rollback()  # nothing of instances is saved, new ones stay new
+        raise
+
     backend.commit()
@@ -0,0 +1,182 @@
+from . import Event
+
+import datetime as dt
+
+from array import array
+from uuid import UUID
+from bisect import bisect_left
+from collections import defaultdict
+from typing import List, Tuple, Iterable, Iterator, Union
+
+_epoch = dt.datetime(1970, 1, 1)
+_microsecond = dt.timedelta(microseconds=1)
+
+
+def _to_microseconds(t: dt.datetime) -> int:
+    return (t - _epoch) // _microsecond
+
+
+def _from_microseconds(us: int) -> dt.datetime:
+    return _epoch + dt.timedelta(microseconds=us)
+
+
+class _Strings:
+    """Interned strings, stored once and referenced by their index."""
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def code(self, s: str) -> int:
+        i = self._index.get(s)
+        if i is None:
+            i = self._index[s] = len(self.values)
+            self.values += [s]
+        return i
+
+    def compact(self):
+        """Drops the index needed for adding strings."""
+        self._index = {}
+
+
+class _AttributeColumn:
+    """Values of one attribute key: the (sorted) rows having it and their values, in a typed array if all values
+    are of the same type."""
+
+    __slots__ = ('rows', 'values', 'kind')
+
+    def __init__(self, rows: List[int], values: list, strings: _Strings):
+        order = sorted(range(len(rows)), key=rows.__getitem__)
+        self.rows = array('I', [rows[i] for i in order])
+        values = [values[i] for i in order]
+
+        types = {type(v) for v in values}
+        self.kind = types.pop() if len(types) == 1 else None
+        try:
+            if self.kind is int:
+                self.values = array('q', values)
+            elif self.kind is float:
+                self.values = array('d', values)
+            elif self.kind is bool:
+                self.values = array('b', values)
+            elif self.kind is dt.datetime:
+                self.values = array('q', [_to_microseconds(v) for v in values])
+            elif self.kind is str:
+                self.values = array('I', [strings.code(v) for v in values])
+            else:
+                self.values = values
+        except OverflowError:  # int out of 64-bit range
+            self.kind = None
+            self.values = values
+
+    def get(self, row: int, strings: _Strings, missing):
+        i = bisect_left(self.rows, row)
+        if i == len(self.rows) or self.rows[i] != row:
+            return missing
+
+        v = self.values[i]
+        if self.kind is bool:
+            return bool(v)
+        elif self.kind is dt.datetime:
+            return _from_microseconds(v)
+        elif self.kind is str:
+            return strings.values[v]
+        return v
+
+
+_missing = object()
+
+
+class EventBatch:
+    """Compact storage of many events: start and end in typed arrays, uuids as 16 bytes, authors and string values
+    interned, attributes in one column per key.
+
+    Indexing (and iterating) creates Event-objects on demand, they are independent of the batch - changing one
+    does not change the batch.
+    """
+
+    def __init__(self,
+                 events: List[Tuple[int, str, dt.datetime, dt.datetime, str]],
+                 attributes: Iterable[Tuple[int, str, object]]):
+        self._strings = _Strings()
+
+        self._ids = array('q')
+        self._starts = array('q')
+        self._ends = array('q')
+        self._authors = array('I')
+        self._uuids = bytearray()
+        self._other_uuids = {}  # row: uuid, for strings which are not canonical UUIDs (allowed by Event)
+
+        row_of = {}
+        for id_, uuid, start, end, author in events:
+            row_of[id_] = len(self._ids)
+            self._ids.append(id_)
+            self._starts.append(_to_microseconds(start))
+            self._ends.append(_to_microseconds(end))
+            self._authors.append(self._strings.code(author))
+            try:
+                b = UUID(uuid).bytes
+                if str(UUID(bytes=b)) != uuid:
+                    raise ValueError
+            except (ValueError, TypeError):
+                b = bytes(16)
+                self._other_uuids[row_of[id_]] = uuid
+            self._uuids += b
+
+        columns = defaultdict(lambda: ([], []))
+        for event_id, key, value in attributes:
+            rows, values = columns[key]
+            rows += [row_of[event_id]]
+            values += [value]
+
+        self._attributes = {key: _AttributeColumn(rows, values, self._strings)
+                            for key, (rows, values) in columns.items()}
+        self._strings.compact()
+
+    def _uuid(self, row: int) -> str:
+        if row in self._other_uuids:
+            return self._other_uuids[row]
+        return str(UUID(bytes=bytes(self._uuids[16 * row:16 * row + 16])))
+
+    @classmethod
+    def from_events(cls, events: List[Event]) -> 'EventBatch':
+        """Batch of (already loaded) events, a persisted event keeps its handle to the database."""
+        rows = [(getattr(e, '_backend_id', -1 - i), e.uuid, e.start, e.end, e.author) for i, e in enumerate(events)]
+        attributes = ((id_, k, v) for (id_, *_), e in zip(rows, events)
+                      for k, v in e.variable_attributes_as_dict().items())
+        return cls(rows, attributes)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _event(self, row: int) -> Event:
+        attributes = {}
+        for key, column in self._attributes.items():
+            value = column.get(row, self._strings, _missing)
+            if value is not _missing:
+                attributes[key] = value
+
+        event = Event(_from_microseconds(self._starts[row]), _from_microseconds(self._ends[row]),
+                      self._strings.values[self._authors[row]], self._uuid(row), **attributes)
+        if self._ids[row] >= 0:
+            event._backend_id = self._ids[row]
+            event._mark_clean()
+        return event
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Event, List[Event]]:
+        if isinstance(index, slice):
+            return [self._event(row) for row in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('EventBatch index out of range')
+        return self._event(index)
+
+    def __iter__(self) -> Iterator[Event]:
+        for row in range(len(self)):
+            yield self._event(row)
+
+    def __repr__(self):
+        return f'EventBatch({len(self)} events, attributes({", ".join(self._attributes)}))'
+
@@ -0,0 +1,224 @@
+from .filter import Predicate, Comparison, Field, Attribute, All, Any, Match, Has, Not, Overlaps, SameAttribute, \
+    Search, _words
+from .evaluator import _op_map
+
+import re
+import datetime as dt
+
+from collections import defaultdict
+from typing import Union, List, Tuple, Iterable
+
+import numpy as np
+
+# numpy storage of attribute values per Python type, datetimes are stored as int64 microseconds since the epoch
+_dtypes = {
+    int: np.int64,
+    float: np.float64,
+    bool: np.bool_,
+    str: np.str_,
+    dt.datetime: np.int64,
+}
+
+
+def _datetime_array(values: List[dt.datetime]) -> np.ndarray:
+    return np.array(values, dtype='datetime64[us]').view(np.int64)
+
+
+def _to_column(value: Union[str, int, bool, float, dt.datetime]):
+    """Literal converted to what it is compared with in a column."""
+    if type(value) == dt.datetime:
+        return np.datetime64(value, 'us').astype(np.int64)
+    return value
+
+
+class EventColumns:
+    """Columnar snapshot of events: fixed fields and one typed array plus validity mask per attribute key and
+    value type (the same key can hold values of different types in different events)."""
+
+    def __init__(self,
+                 events: List[Tuple[int, str, dt.datetime, dt.datetime, str]],
+                 attributes: Iterable[Tuple[int, str, object]]):
+        ids, uuids, starts, ends, authors = zip(*events) if events else ([], [], [], [], [])
+
+        self.id = np.array(ids, dtype=np.int64)
+        self.uuid = np.array(uuids, dtype=np.str_)
+        self.start = _datetime_array(starts)
+        self.end = _datetime_array(ends)
+        self.author = np.array(authors, dtype=np.str_)
+
+        row_of = {id_: row for row, id_ in enumerate(ids)}
+
+        present = defaultdict(list)
+        typed = defaultdict(lambda: ([], []))
+        for event_id, key, value in attributes:
+            row = row_of[event_id]
+            present[key] += [row]
+            if value is not None:
+                rows, values = typed[key, type(value)]
+                rows += [row]
+                values += [value]
+
+        self._present = {key: self._mask(rows) for key, rows in present.items()}
+
+        self._attributes = {}
+        for (key, py_type), (rows, values) in typed.items():
+            if py_type == dt.datetime:
+                values = _datetime_array(values)
+            else:
+                values = np.array(values, dtype=_dtypes[py_type])
+            column = np.zeros(len(self), dtype=values.dtype)
+            column[rows] = values
+            self._attributes[key, py_type] = (column, self._mask(rows))
+
+    def __len__(self):
+        return len(self.id)
+
+    def _mask(self, rows: List[int]) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=np.bool_)
+        mask[rows] = True
+        return mask
+
+    def field(self, name: str) -> np.ndarray:
+        if name not in ['start', 'end', 'author', 'uuid']:
+            raise AttributeError('Invalid field name.')
+        return getattr(self, name)
+
+    def attribute(self, key: str, py_type: type) -> Tuple[np.ndarray, np.ndarray]:
+        """Values and validity mask of attribute key for values of type py_type."""
+        if (key, py_type) not in self._attributes:
+            return np.zeros(len(self), dtype=_dtypes[py_type]), np.zeros(len(self), dtype=np.bool_)
+        return self._attributes[key, py_type]
+
+    def has(self, key: str) -> np.ndarray:
+        return self._present.get(key, np.zeros(len(self), dtype=np.bool_))
+
+    def mask(self, pred: Predicate) -> np.ndarray:
+        """Boolean mask of the events matching pred."""
+        return MaskCompiler(self).visit_predicate(pred)
+
+    def uuids(self, pred: Predicate) -> np.ndarray:
+        return self.uuid[self.mask(pred)]
+
+
+class MaskCompiler:
+    """Evaluates a predicate on EventColumns to a boolean mask with numpy-operations.
+
+    The semantics follow the SQL generated by PredicateVisitor, see also evaluator.PredicateCompiler.
+    """
+
+    def __init__(self, columns: EventColumns):
+        self._columns = columns
+
+    def _visit_literal(self, operand: Union[str, int, bool, float, dt.datetime]):
+        if type(operand) not in [str, int, bool, float, dt.datetime]:
+            raise TypeError("Literal must be of allowed type.")
+        return operand
+
+    def _visit_comparison(self, comp: Comparison) -> np.ndarray:
+        if not type(comp._lhs) in [Field, Attribute]:
+            raise AttributeError('Invalid LHS operand instance.')
+
+        rhs = self._visit_literal(comp._rhs)
+
+        if comp._op not in _op_map:
+            raise AttributeError('Invalid comparison operator.')
+        op = _op_map[comp._op]
+
+        if isinstance(comp._lhs, Field):
+            return op(self._columns.field(comp._lhs.value), _to_column(rhs))
+
+        else:
+            values, valid = self._columns.attribute(comp._lhs.value, type(rhs))
+            return valid & op(values, _to_column(rhs))
+
+    def _visit_all(self, all_: All) -> np.ndarray:
+        mask = np.ones(len(self._columns), dtype=np.bool_)
+        for pred in all_._predicates:
+            mask &= self.visit_predicate(pred)
+            if not mask.any():
+                break
+        return mask
+
+    def _visit_any(self, any_: Any) -> np.ndarray:
+        mask = np.zeros(len(self._columns), dtype=np.bool_)
+        for pred in any_._predicates:
+            mask |= self.visit_predicate(pred)
+            if mask.all():
+                break
+        return mask
+
+    def _visit_not(self, not__: Not) -> np.ndarray:
+        return ~self.visit_predicate(not__._operand)
+
+    def _visit_has(self, has_: Has) -> np.ndarray:
+        return self._columns.has(has_._operand.value).copy()
+
+    def _visit_match(self, match_: Match) -> np.ndarray:
+        if not type(match_._lhs) in [Field, Attribute]:
+            raise AttributeError('Invalid LHS operand instance - expected Field or Attribute.')
+
+        if not type(match_._rhs) == str:
+            raise AttributeError('Invalid RHS operand instance - expected str.')
+
+        search = re.compile(match_._rhs).search
+
+        if isinstance(match_._lhs, Field):
+            values = self._columns.field(match_._lhs.value)
+            return np.fromiter((search(v) is not None for v in values), dtype=np.bool_, count=len(values))
+
+        else:
+            values, valid = self._columns.attribute(match_._lhs.value, str)
+            mask = np.zeros(len(values), dtype=np.bool_)
+            rows = np.flatnonzero(valid)
+            mask[rows] = [search(v) is not None for v in values[rows]]
+            return mask
+
+    def _visit_search(self, search: Search) -> np.ndarray:
+        if not type(search._lhs) in [Field, Attribute]:
+            raise AttributeError('Invalid LHS operand instance - expected Field or Attribute.')
+
+        if not type(search._rhs) == str:
+            raise AttributeError('Invalid RHS operand instance - expected str.')
+
+        words = set(search.words())
+        if not words:
+            raise AttributeError('Invalid RHS operand - expected at least one word.')
+
+        if isinstance(search._lhs, Field):
+            values = self._columns.field(search._lhs.value)
+            return np.fromiter((words.issubset(_words(v)) for v in values), dtype=np.bool_, count=len(values))
+
+        else:
+            values, valid = self._columns.attribute(search._lhs.value, str)
+            mask = np.zeros(len(values), dtype=np.bool_)
+            rows = np.flatnonzero(valid)
+            mask[rows] = [words.issubset(_words(v)) for v in values[rows]]
+            return mask
+
+    def _visit_overlaps(self, overlaps: Overlaps) -> np.ndarray:
+        if type(overlaps._start) != dt.datetime or type(overlaps._end) != dt.datetime:
+            raise AttributeError('Invalid operand instance - expected datetime.')
+
+        return (self._columns.start <= _to_column(overlaps._end)) & (self._columns.end >= _to_column(overlaps._start))
+
+    def visit_predicate(self, pred: Predicate) -> np.ndarray:
+        if isinstance(pred, Comparison):
+            return self._visit_comparison(pred)
+        elif isinstance(pred, All):
+            return self._visit_all(pred)
+        elif isinstance(pred, Any):
+            return self._visit_any(pred)
+        elif isinstance(pred, Not):
+            return self._visit_not(pred)
+        elif isinstance(pred, Has):
+            return self._visit_has(pred)
+        elif isinstance(pred, Match):
+            return self._visit_match(pred)
+        elif isinstance(pred, Search):
+            return self._visit_search(pred)
+        elif isinstance(pred, Overlaps):
+            return self._visit_overlaps(pred)
+        elif isinstance(pred, SameAttribute):
+            return self.visit_predicate(pred.combined())
+        else:
+            raise NotImplementedError('Unexpected predicated instance.')
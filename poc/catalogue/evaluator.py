@@ -0,0 +1,179 @@
+from . import Event, Catalogue, _valid_key
+from .filter import Predicate, Comparison, Field, Attribute, All, Any, Match, Has, Not, Overlaps, SameAttribute, \
+    Search, _words
+
+import re
+import datetime as dt
+
+from typing import Union, List, Callable
+
+from operator import __eq__, __ne__, __ge__, __gt__, __le__, __lt__
+
+_op_map = {
+    '==': __eq__,
+    '!=': __ne__,
+    '<': __lt__,
+    '<=': __le__,
+    '>': __gt__,
+    '>=': __ge__,
+}
+
+_missing = object()
+
+
+class PredicateCompiler:
+    """Compiles a predicate to a Python callable evaluating it on already loaded Events or Catalogues.
+
+    The semantics follow the SQL generated by PredicateVisitor: an attribute only compares to a literal of
+    the same type (the type selects the value-column in the database), a missing attribute never matches.
+    """
+
+    def _visit_literal(self, operand: Union[str, int, bool, float, dt.datetime]):
+        if type(operand) not in [str, int, bool, float, dt.datetime]:
+            raise TypeError("Literal must be of allowed type.")
+        return operand
+
+    @staticmethod
+    def _visit_attribute(attribute: Attribute):
+        key = attribute.value
+        if not _valid_key.match(key):
+            raise AttributeError('Invalid attribute name.')
+        return key
+
+    def _visit_comparison(self, comp: Comparison) -> Callable:
+        if not type(comp._lhs) in [Field, Attribute]:
+            raise AttributeError('Invalid LHS operand instance.')
+
+        rhs = self._visit_literal(comp._rhs)
+
+        if comp._op not in _op_map:
+            raise AttributeError('Invalid comparison operator.')
+        op = _op_map[comp._op]
+
+        if isinstance(comp._lhs, Field):
+            name = comp._lhs.value
+            return lambda obj: op(getattr(obj, name), rhs)
+
+        else:
+            key = self._visit_attribute(comp._lhs)
+            rhs_type = type(rhs)
+
+            def compare(obj):
+                value = obj.__dict__.get(key, _missing)
+                return type(value) is rhs_type and op(value, rhs)
+
+            return compare
+
+    def _visit_all(self, all_: All) -> Callable:
+        predicates = [self.visit_predicate(pred) for pred in all_._predicates]
+
+        def all_of(obj):
+            for pred in predicates:
+                if not pred(obj):
+                    return False
+            return True
+
+        return all_of
+
+    def _visit_any(self, any_: Any) -> Callable:
+        predicates = [self.visit_predicate(pred) for pred in any_._predicates]
+
+        def any_of(obj):
+            for pred in predicates:
+                if pred(obj):
+                    return True
+            return False
+
+        return any_of
+
+    def _visit_not(self, not__: Not) -> Callable:
+        operand = self.visit_predicate(not__._operand)
+        return lambda obj: not operand(obj)
+
+    def _visit_has(self, has_: Has) -> Callable:
+        key = self._visit_attribute(has_._operand)
+        return lambda obj: key in obj.__dict__
+
+    def _visit_match(self, match_: Match) -> Callable:
+        if not type(match_._lhs) in [Field, Attribute]:
+            raise AttributeError('Invalid LHS operand instance - expected Field or Attribute.')
+
+        if not type(match_._rhs) == str:
+            raise AttributeError('Invalid RHS operand instance - expected str.')
+
+        search = re.compile(match_._rhs).search
+
+        if isinstance(match_._lhs, Field):
+            name = match_._lhs.value
+            return lambda obj: search(getattr(obj, name)) is not None
+
+        else:
+            key = self._visit_attribute(match_._lhs)
+
+            def match(obj):
+                value = obj.__dict__.get(key)
+                return type(value) is str and search(value) is not None
+
+            return match
+
+    def _visit_search(self, search: Search) -> Callable:
+        if not type(search._lhs) in [Field, Attribute]:
+            raise AttributeError('Invalid LHS operand instance - expected Field or Attribute.')
+
+        if not type(search._rhs) == str:
+            raise AttributeError('Invalid RHS operand instance - expected str.')
+
+        words = set(search.words())
+        if not words:
+            raise AttributeError('Invalid RHS operand - expected at least one word.')
+
+        if isinstance(search._lhs, Field):
+            name = search._lhs.value
+            return lambda obj: words.issubset(_words(getattr(obj, name)))
+
+        else:
+            key = self._visit_attribute(search._lhs)
+
+            def contains(obj):
+                value = obj.__dict__.get(key)
+                return type(value) is str and words.issubset(_words(value))
+
+            return contains
+
+    def _visit_overlaps(self, overlaps: Overlaps) -> Callable:
+        if type(overlaps._start) != dt.datetime or type(overlaps._end) != dt.datetime:
+            raise AttributeError('Invalid operand instance - expected datetime.')
+
+        start, end = overlaps._start, overlaps._end
+        return lambda obj: obj.start <= end and obj.end >= start
+
+    def visit_predicate(self, pred: Predicate) -> Callable:
+        if isinstance(pred, Comparison):
+            return self._visit_comparison(pred)
+        elif isinstance(pred, All):
+            return self._visit_all(pred)
+        elif isinstance(pred, Any):
+            return self._visit_any(pred)
+        elif isinstance(pred, Not):
+            return self._visit_not(pred)
+        elif isinstance(pred, Has):
+            return self._visit_has(pred)
+        elif isinstance(pred, Match):
+            return self._visit_match(pred)
+        elif isinstance(pred, Search):
+            return self._visit_search(pred)
+        elif isinstance(pred, Overlaps):
+            return self._visit_overlaps(pred)
+        elif isinstance(pred, SameAttribute):
+            return self.visit_predicate(pred.combined())
+        else:
+            raise NotImplementedError('Unexpected predicated instance.')
+
+
+def compile_predicate(pred: Predicate) -> Callable[[Union[Event, Catalogue]], bool]:
+    return PredicateCompiler().visit_predicate(pred)
+
+
+def filter_events(events: List[Event], pred: Predicate) -> List[Event]:
+    f = compile_predicate(pred)
+    return [e for e in events if f(e)]
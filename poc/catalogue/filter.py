@@ -1,5 +1,6 @@
+import re
 import datetime as dt
-from typing import Union, Literal
+from typing import Union, Literal, Type, List
 
 
 class Field:
@@ -9,6 +10,12 @@ class Field:
     def __repr__(self):
         return f"Field('{self.value}')"
 
+    def __eq__(self, other):
+        return type(self) is type(other) and self.value == other.value
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.value))
+
 
 class Attribute:
     def __init__(self, name: str):
@@ -17,9 +24,47 @@ class Attribute:
     def __repr__(self):
         return f"Attribute('{self.value}')"
 
+    def __eq__(self, other):
+        return type(self) is type(other) and self.value == other.value
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.value))
+
+
+def _typed(literal):
+    # True == 1, but they compare to different columns
+    return type(literal), literal
+
 
 class Predicate:
-    pass
+    """Predicates are compared and hashed structurally.
+
+    _key() returns the structure of a predicate as tuple, every literal value replaced by literal(value). The
+    literals are visited in the same order as they are bound by PredicateVisitor.
+    """
+
+    def _key(self, literal) -> tuple:
+        raise NotImplementedError
+
+    def _node(self, literal) -> tuple:
+        return type(self).__name__, self._key(literal)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._key(_typed) == other._key(_typed)
+
+    def __hash__(self):
+        return hash(self._node(_typed))
+
+    def shape(self) -> tuple:
+        """Structure without the literal values (only their types), equal for predicates differing only
+        in literals."""
+        return self._node(type)
+
+    def literals(self) -> list:
+        """Literal values in the order of shape()."""
+        values = []
+        self._key(values.append)
+        return values
 
 
 class Comparison(Predicate):
@@ -36,6 +81,9 @@ class Comparison(Predicate):
     def __repr__(self):
         return f"Comparison('{self._op}', {self._lhs}, {repr(self._rhs)})"
 
+    def _key(self, literal) -> tuple:
+        return self._op, self._lhs, literal(self._rhs)
+
 
 class Match(Predicate):
     def __init__(self,
@@ -47,6 +95,37 @@ class Match(Predicate):
     def __repr__(self):
         return f"Match({self._lhs}, {repr(self._rhs)})"
 
+    def _key(self, literal) -> tuple:
+        return self._lhs, self._rhs  # the regex is part of the structure
+
+
+_word = re.compile(r'[^\W_]+')
+
+
+class Search(Predicate):
+    """Full-text search: the text contains every word of the query, case-insensitively. Words are runs of letters
+    and digits, a word only matches a whole word of the text (the tokens of SQLite's FTS5 unicode61 tokenizer)."""
+
+    def __init__(self,
+                 lhs: Union[Field, Attribute],
+                 rhs: str):  # words
+        self._lhs = lhs
+        self._rhs = rhs
+
+    def __repr__(self):
+        return f"Search({self._lhs}, {repr(self._rhs)})"
+
+    def _key(self, literal) -> tuple:
+        return self._lhs, self._rhs  # the words are part of the structure, as the regex of Match
+
+    def words(self) -> List[str]:
+        """Distinct lower-cased words of the query, in order."""
+        return list(dict.fromkeys(_words(self._rhs)))
+
+
+def _words(text: str) -> List[str]:
+    return _word.findall(text.lower())
+
 
 class Not(Predicate):
     def __init__(self, operand: "Predicate"):
@@ -55,6 +134,9 @@ class Not(Predicate):
     def __repr__(self):
         return f"Not({self._operand})"
 
+    def _key(self, literal) -> tuple:
+        return (self._operand._node(literal),)
+
 
 class Has(Predicate):
     def __init__(self, operand: Attribute):
@@ -63,6 +145,9 @@ class Has(Predicate):
     def __repr__(self):
         return f"Has({self._operand})"
 
+    def _key(self, literal) -> tuple:
+        return (self._operand,)
+
 
 class All(Predicate):
     def __init__(self, *args: Predicate):
@@ -71,6 +156,9 @@ class All(Predicate):
     def __repr__(self):
         return "All({})".format(', '.join(repr(p) for p in self._predicates))
 
+    def _key(self, literal) -> tuple:
+        return tuple(p._node(literal) for p in self._predicates)
+
 
 class Any(Predicate):
     def __init__(self, *args: Predicate):
@@ -78,3 +166,51 @@ class Any(Predicate):
 
     def __repr__(self):
         return "Any({})".format(', '.join(repr(p) for p in self._predicates))
+
+    def _key(self, literal) -> tuple:
+        return tuple(p._node(literal) for p in self._predicates)
+
+
+class Overlaps(Predicate):
+    def __init__(self, start: dt.datetime, end: dt.datetime):
+        self._start = start
+        self._end = end
+
+    def __repr__(self):
+        return f"Overlaps({repr(self._start)}, {repr(self._end)})"
+
+    def _key(self, literal) -> tuple:
+        return literal(self._start), literal(self._end)
+
+
+class AnyEvent(Predicate):
+    """Catalogues having at least one event matching the predicate, only applicable to catalogues. Only the events
+    added to a catalogue are considered, smart catalogues have none."""
+
+    def __init__(self, operand: Predicate):
+        self._operand = operand
+
+    def __repr__(self):
+        return f"AnyEvent({self._operand})"
+
+    def _key(self, literal) -> tuple:
+        return (self._operand._node(literal),)
+
+
+class SameAttribute(Predicate):
+    """Comparisons of the same attribute combined by All or Any, evaluated on one attribute-row (one
+    EXISTS in SQL instead of one per comparison). Created by the optimizer."""
+
+    def __init__(self, combinator: Union[Type[All], Type[Any]], *comparisons: Comparison):
+        self._combinator = combinator
+        self._comparisons = comparisons
+
+    def __repr__(self):
+        return "SameAttribute({}, {})".format(self._combinator.__name__,
+                                              ', '.join(repr(c) for c in self._comparisons))
+
+    def _key(self, literal) -> tuple:
+        return self._combinator.__name__, tuple(c._node(literal) for c in self._comparisons)
+
+    def combined(self) -> Predicate:
+        return self._combinator(*self._comparisons)
@@ -0,0 +1,235 @@
+from . import Event, _valid_key
+
+import os
+import csv
+import math
+import warnings
+import datetime as dt
+
+from itertools import islice
+from pathlib import Path
+from uuid import uuid4
+from typing import Dict, Iterator, List, Tuple, Optional, Callable
+
+
+def _naive(t: dt.datetime) -> dt.datetime:
+    # datetimes are stored without timezone, as UTC
+    if t.tzinfo is not None:
+        t = t.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return t
+
+
+def _integer(text: str) -> int:
+    value = int(text)
+    if not -2 ** 63 <= value < 2 ** 63:  # stored as 64-bit integer
+        raise ValueError
+    return value
+
+
+def _float(text: str) -> Optional[float]:
+    value = float(text)
+    return None if math.isnan(value) else value  # SQLite would store NULL
+
+
+def _boolean(text: str) -> bool:
+    lowered = text.lower()
+    if lowered not in ['true', 'false']:
+        raise ValueError
+    return lowered == 'true'
+
+
+def _datetime(text: str) -> dt.datetime:
+    return _naive(dt.datetime.fromisoformat(text[:-1] + '+00:00' if text.endswith('Z') else text))
+
+
+# the types of the type_map of the attribute tables (integer, float, boolean, datetime, string): a column of a CSV-file
+# is read as the first of them all of its texts parse as, see _inferred
+_parsers = [_integer, _float, _boolean, _datetime]
+
+
+def _parses(parse: Callable, texts: List[str]) -> bool:
+    try:
+        for text in texts:
+            parse(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _inferred(chunks: Iterator[Dict[str, list]]) -> Dict[str, Optional[Callable]]:
+    """Per column the first of _parsers all of its (non-empty) texts parse as, None for string. Inferred over all chunks
+    (a pass of its own over the file): an attribute only compares to literals of its type, a column is thus never of
+    mixed type - a float late in a column of integers makes it a column of floats."""
+    remaining = {}
+    for columns in chunks:
+        for column, values in columns.items():
+            texts = [v for v in values if type(v) is str and v]
+            parsers = remaining.setdefault(column, _parsers)
+            remaining[column] = [parse for parse in parsers if _parses(parse, texts)]
+    return {column: parsers[0] if parsers else None for column, parsers in remaining.items()}
+
+
+def _normalized(value):
+    """Python value of a typed value read (numpy scalars, bytes, aware datetimes, ...), None if it is missing."""
+    if hasattr(value, 'item'):  # numpy scalar
+        value = value.item()
+    if type(value) is bytes:
+        value = value.decode()
+
+    if type(value) is float and math.isnan(value):
+        return None
+    elif type(value) is dt.date:
+        return dt.datetime.combine(value, dt.time())
+    elif type(value) is dt.datetime:
+        return _naive(value)
+    elif value is not None and type(value) not in [str, int, float, bool]:
+        raise ValueError(f'Unsupported value {value!r}.')
+    return value
+
+
+class _Column:
+    """Converts the values of a column, text is parsed by parse (kept as string if None). An empty text is a missing
+    value."""
+
+    def __init__(self, parse: Callable = None):
+        self._parse = parse
+
+    def convert(self, values: list) -> list:
+        return [self._value(v) for v in values]
+
+    def _value(self, value):
+        if type(value) is not str:
+            return _normalized(value)
+        if not value:
+            return None
+        if self._parse is None:
+            return value
+
+        try:
+            return self._parse(value)
+        except ValueError:  # only for start and end, the parse of the other columns is inferred from their texts
+            return value
+
+
+def _csv_columns(path: str, chunk_size: int) -> Iterator[Dict[str, list]]:
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        rows = (row for row in reader if row)  # without blank lines
+        while True:
+            chunk = [row + [''] * (len(header) - len(row)) for row in islice(rows, chunk_size)]
+            if not chunk:
+                return
+            yield dict(zip(header, map(list, zip(*chunk))))
+
+
+_votable_warning_size = 100 * 2 ** 20
+
+
+def _votable_columns(path: str, chunk_size: int) -> Iterator[Dict[str, list]]:
+    from astropy.io.votable import parse_single_table
+    import numpy as np
+
+    if os.path.getsize(path) > _votable_warning_size:
+        warnings.warn(f'{path} is parsed as a whole by astropy, importing it needs memory of several times its size.',
+                      ResourceWarning)
+
+    table = parse_single_table(path).to_table(use_names_over_ids=True)
+    for i in range(0, len(table), chunk_size):
+        chunk = table[i:i + chunk_size]
+
+        columns = {}
+        for name in chunk.colnames:
+            column = chunk[name]
+            if hasattr(column, 'to_datetime'):  # Time-column of a field referring to a TIMESYS
+                columns[name] = list(column.utc.to_datetime())
+            else:
+                columns[name] = [None if masked else value for value, masked in
+                                 zip(np.ma.getdata(column).tolist(), np.ma.getmaskarray(column).tolist())]
+        yield columns
+
+
+def _parquet_columns(path: str, chunk_size: int) -> Iterator[Dict[str, list]]:
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pydict()
+
+
+_readers = {
+    'csv': _csv_columns,
+    'votable': _votable_columns,
+    'parquet': _parquet_columns,
+}
+
+_suffixes = {
+    '.csv': 'csv',
+    '.xml': 'votable',
+    '.vot': 'votable',
+    '.votable': 'votable',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+}
+
+
+def read_events(path: str, author: str, names: Dict[str, Optional[str]] = None, format: str = None,
+                chunk_size: int = 10000) -> Iterator[List[Tuple[Dict, Dict]]]:
+    """Events of a CSV-, VOTable- or Parquet-file (format by the suffix of path if not given) as chunks of at most
+    chunk_size (fields, attributes)-pairs, read while iterating: memory is bounded by the chunk size for CSV- and
+    Parquet-files. VOTables are not: astropy parses them as a whole, a ResourceWarning is issued for large ones.
+    VOTables need astropy, Parquet-files pyarrow.
+
+    Columns are named as the fields (start, end, optionally author and uuid) or attributes they hold, names renames
+    them ({column: name}, None skips a column). The columns of VOTables and Parquet-files keep their type, those of
+    CSV-files are read as integer, float, boolean (true or false), ISO-datetime or string - whichever all texts of
+    the column parse as, the file is read twice. An empty text is a missing attribute. Events without author get
+    author.
+    """
+    format = format or _suffixes.get(Path(path).suffix.lower())
+    if format not in _readers:
+        raise ValueError(f'Unknown format of {path}.')
+
+    names = names or {}
+    keys = None
+    converters = {}
+    count = 0
+
+    parsers = _inferred(_csv_columns(path, chunk_size)) if format == 'csv' else {}
+
+    for columns in _readers[format](path, chunk_size):
+        if keys is None:  # the key-names are checked once per column, not per event
+            keys = {column: names.get(column, column) for column in columns}
+            keys = {column: key for column, key in keys.items() if key is not None}
+            for column, key in keys.items():
+                if key not in Event._fixed_keys and not _valid_key.match(key):
+                    raise ValueError(f'Invalid key-name for event-meta-data of column {column}:', key)
+            if not {'start', 'end'}.issubset(keys.values()):
+                raise ValueError(f'No start- and end-column in {path}.')
+
+            for column, key in keys.items():
+                if key in ['start', 'end']:
+                    converters[column] = _Column(_datetime)
+                elif key in ['author', 'uuid']:
+                    converters[column] = _Column()
+                else:
+                    converters[column] = _Column(parsers.get(column))
+
+        values = {keys[column]: converter.convert(columns[column]) for column, converter in converters.items()}
+        starts, ends = values.pop('start'), values.pop('end')
+        authors, uuids = values.pop('author', None), values.pop('uuid', None)
+
+        rows = []
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            if type(start) is not dt.datetime or type(end) is not dt.datetime:
+                raise ValueError(f'Invalid start or end of event {count + i} in {path}.')
+
+            fields = dict(start=start, end=end,
+                          author=str(authors[i]) if authors and authors[i] is not None else author,
+                          uuid=str(uuids[i]) if uuids and uuids[i] is not None else str(uuid4()))
+            rows += [(fields, {k: v[i] for k, v in values.items() if v[i] is not None})]
+
+        count += len(rows)
+        yield rows
@@ -0,0 +1,226 @@
+from .filter import Predicate, Comparison, Field, Attribute, All, Any, Match, Has, Not, Overlaps, SameAttribute, \
+    AnyEvent, Search
+
+from collections import OrderedDict
+from typing import List, Optional
+
+# constants, evaluated like their SQL-counterpart and_()/or_() without clauses
+TRUE = All()
+FALSE = Any()
+
+_negated_op = {'==': '!=', '!=': '==', '<': '>=', '<=': '>', '>': '<=', '>=': '<'}
+
+_indexed_fields = ['start', 'end']
+
+
+def _cost(pred: Predicate) -> int:
+    """Rough relative cost of evaluating pred per event in SQL."""
+    if isinstance(pred, Overlaps):
+        return 0
+    elif isinstance(pred, Comparison) and isinstance(pred._lhs, Field):
+        return 0 if pred._lhs.value in _indexed_fields else 1
+    elif isinstance(pred, Has):
+        return 2
+    elif isinstance(pred, (Comparison, SameAttribute)):
+        return 3
+    elif isinstance(pred, Search):  # a lookup in the full-text index where there is one, else LIKE and REGEXP
+        return 4
+    elif isinstance(pred, Match):
+        return 5 if isinstance(pred._lhs, Field) else 6
+    elif isinstance(pred, Not):
+        return _cost(pred._operand)
+    elif isinstance(pred, (All, Any)):
+        return 1 + sum(_cost(p) for p in pred._predicates)
+    elif isinstance(pred, AnyEvent):
+        return 4 + _cost(pred._operand)
+    return 10
+
+
+class _Bounds:
+    """Conjunction of comparisons of one operand with literals of one type, folded to the tightest bounds."""
+
+    def __init__(self):
+        self.eq = []
+        self.ne = []
+        self.lo = None  # (value, inclusive)
+        self.hi = None
+
+    def add(self, op: str, v) -> bool:
+        if op == '==':
+            if v not in self.eq:
+                self.eq += [v]
+        elif op == '!=':
+            if v not in self.ne:
+                self.ne += [v]
+        elif op in ['>', '>=']:
+            if self.lo is None or v > self.lo[0] or (v == self.lo[0] and op == '>'):
+                self.lo = (v, op == '>=')
+        elif op in ['<', '<=']:
+            if self.hi is None or v < self.hi[0] or (v == self.hi[0] and op == '<'):
+                self.hi = (v, op == '<=')
+        else:
+            return False
+        return True
+
+    def _within(self, v) -> bool:
+        return (self.lo is None or v > self.lo[0] or (self.lo[1] and v == self.lo[0])) and \
+               (self.hi is None or v < self.hi[0] or (self.hi[1] and v == self.hi[0]))
+
+    def comparisons(self, lhs) -> Optional[List[Comparison]]:
+        """Equivalent comparisons, None if they contradict each other."""
+        if self.lo is not None and self.hi is not None and self.lo[0] == self.hi[0] and self.lo[1] and self.hi[1]:
+            self.add('==', self.lo[0])
+
+        if len(self.eq) > 1:
+            return None
+
+        if self.eq:
+            v = self.eq[0]
+            if not self._within(v) or v in self.ne:
+                return None
+            return [Comparison('==', lhs, v)]
+
+        if self.lo is not None and self.hi is not None and \
+                (self.lo[0] > self.hi[0] or (self.lo[0] == self.hi[0] and not (self.lo[1] and self.hi[1]))):
+            return None
+
+        result = []
+        if self.lo is not None:
+            result += [Comparison('>=' if self.lo[1] else '>', lhs, self.lo[0])]
+        if self.hi is not None:
+            result += [Comparison('<=' if self.hi[1] else '<', lhs, self.hi[0])]
+        return result + [Comparison('!=', lhs, v) for v in self.ne if self._within(v)]
+
+
+class PredicateOptimizer:
+    """Rewrites a predicate to an equivalent one which is cheaper to evaluate in SQL:
+
+    - associative All/Any are flattened, duplicates removed, single-operand All/Any replaced by the operand
+    - Not is pushed inward (double negation, De Morgan, negated comparison of a field)
+    - comparisons of the same field or attribute in All are folded to their tightest bounds,
+      comparisons of the same attribute are merged into one SameAttribute (one EXISTS)
+    - contradictions and tautologies (p and not p, empty ranges, ...) are folded to FALSE/TRUE
+    - cheap indexed field-predicates are ordered first
+
+    Attributes may be missing, Not(Comparison(Attribute)) is therefore not the negated comparison.
+    """
+
+    def _visit_not(self, not__: Not) -> Predicate:
+        operand = not__._operand
+
+        if isinstance(operand, Not):
+            return self.visit_predicate(operand._operand)
+        elif isinstance(operand, All):
+            return self.visit_predicate(Any(*[Not(p) for p in operand._predicates]))
+        elif isinstance(operand, Any):
+            return self.visit_predicate(All(*[Not(p) for p in operand._predicates]))
+        elif isinstance(operand, Comparison) and isinstance(operand._lhs, Field) and operand._op in _negated_op:
+            return Comparison(_negated_op[operand._op], operand._lhs, operand._rhs)
+
+        return Not(self.visit_predicate(operand))
+
+    def _operands(self, pred: Predicate, combinator) -> List[Predicate]:
+        """Optimized, flattened and de-duplicated operands of an All or Any."""
+        operands = []
+        for p in pred._predicates:
+            p = self.visit_predicate(p)
+            for q in p._predicates if type(p) is combinator else [p]:
+                if q not in operands:
+                    operands += [q]
+        return operands
+
+    @staticmethod
+    def _complementary(operands: List[Predicate]) -> bool:
+        return any(isinstance(p, Not) and p._operand in operands for p in operands)
+
+    @staticmethod
+    def _group_comparisons(operands: List[Predicate]):
+        groups = OrderedDict()
+        others = []
+        for p in operands:
+            if isinstance(p, Comparison) and type(p._lhs) in [Field, Attribute]:
+                groups.setdefault(p._lhs, []).append(p)
+            else:
+                others += [p]
+        return groups, others
+
+    @staticmethod
+    def _finish(combinator, operands: List[Predicate]) -> Predicate:
+        operands.sort(key=_cost)
+        if len(operands) == 1:
+            return operands[0]
+        return combinator(*operands)
+
+    def _visit_all(self, all_: All) -> Predicate:
+        operands = self._operands(all_, All)
+
+        if FALSE in operands or self._complementary(operands):
+            return FALSE
+
+        groups, operands = self._group_comparisons(operands)
+        for lhs, comparisons in groups.items():
+            by_type = OrderedDict()
+            for c in comparisons:
+                by_type.setdefault(type(c._rhs), []).append(c)
+
+            if isinstance(lhs, Attribute) and len(by_type) > 1:
+                return FALSE  # the value of an attribute has one type, a comparison requires the same type
+
+            folded = []
+            for rhs_type, cs in by_type.items():
+                if rhs_type is bool:  # booleans are not ordered in SQL
+                    folded += cs
+                    continue
+
+                bounds = _Bounds()
+                unfoldable = [c for c in cs if not bounds.add(c._op, c._rhs)]
+                reduced = bounds.comparisons(lhs)
+                if reduced is None:
+                    return FALSE
+                folded += reduced + unfoldable
+
+            if isinstance(lhs, Attribute) and len(folded) > 1:
+                operands += [SameAttribute(All, *folded)]
+            else:
+                operands += folded
+
+        # a comparison, match or search of an attribute implies its existence
+        implied = {p._lhs for p in operands
+                   if isinstance(p, (Comparison, Match, Search)) and isinstance(p._lhs, Attribute)}
+        implied |= {p._comparisons[0]._lhs for p in operands if isinstance(p, SameAttribute)}
+        operands = [p for p in operands if not (isinstance(p, Has) and p._operand in implied)]
+
+        return self._finish(All, operands)
+
+    def _visit_any(self, any_: Any) -> Predicate:
+        operands = self._operands(any_, Any)
+
+        if TRUE in operands or self._complementary(operands):
+            return TRUE
+
+        groups, operands = self._group_comparisons(operands)
+        for lhs, comparisons in groups.items():
+            if isinstance(lhs, Attribute) and len(comparisons) > 1:
+                operands += [SameAttribute(Any, *comparisons)]
+            else:
+                operands += comparisons
+
+        return self._finish(Any, operands)
+
+    def visit_predicate(self, pred: Predicate) -> Predicate:
+        if isinstance(pred, All):
+            return self._visit_all(pred)
+        elif isinstance(pred, Any):
+            return self._visit_any(pred)
+        elif isinstance(pred, Not):
+            return self._visit_not(pred)
+        elif isinstance(pred, (Comparison, Match, Search, Has, Overlaps, SameAttribute)):
+            return pred
+        elif isinstance(pred, AnyEvent):  # the operand applies to events, optimized on its own
+            return AnyEvent(self.visit_predicate(pred._operand))
+        else:
+            raise NotImplementedError('Unexpected predicated instance.')
+
+
+def optimize(pred: Predicate) -> Predicate:
+    return PredicateOptimizer().visit_predicate(pred)
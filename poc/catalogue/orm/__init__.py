@@ -1,69 +1,98 @@
 from . import orm
+from .materialized import MaterializedResults
+from .identity import IdentityMap
+from .regex import regexp, required_literals, prefix_successor
 
 from .. import Event, Catalogue
-from ..filter import Predicate, Comparison, Field, Attribute, All, Any, Match, Has, Not
-
-from pathlib import Path
-
-import pickle
+from ..filter import Predicate, Comparison, Field, Attribute, All, Any, Match, Has, Not, Overlaps, SameAttribute, \
+    AnyEvent, Search
+from ..optimizer import optimize
+from ..pagination import Page, encode_cursor, decode_cursor
+from ..batch import EventBatch
+
+import re
+import threading
 import datetime as dt
 
-from typing import Union, List
+from typing import Union, List, Iterator, Iterable, Sequence, Optional, Tuple, Set, Dict
+from collections import OrderedDict, Counter
 
-from sqlalchemy import create_engine, and_, or_, not_
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine, event, inspect, make_url, and_, or_, not_, insert, select, update, delete, \
+    bindparam, true, false, tuple_, func, String
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, object_session, selectinload, configure_mappers
 
-from operator import __eq__, __ne__, __ge__, __gt__, __le__, __lt__
+from ..evaluator import _op_map
 
 
 class PredicateVisitor:
-    def __init__(self, orm_class: Union[orm.Event, orm.Catalogue]):
+    """Translates a predicate to an SQL expression.
+
+    Literals become bound parameters named "pred_<n>", numbered in the order of Predicate.literals(),
+    see CompiledPredicates."""
+
+    def __init__(self, orm_class: Union[orm.Event, orm.Catalogue], interval_index: bool = False,
+                 fulltext_index: bool = False):
         self._orm_class = orm_class
+        self._interval_index = interval_index
+        self._fulltext_index = fulltext_index
+        self._bound = 0
 
     def _visit_literal(self, operand: Union[str, int, bool, float, dt.datetime]):
         if type(operand) not in [str, int, bool, float, dt.datetime]:
             raise TypeError("Literal must be of allowed type.")
-        return operand
+
+        param = bindparam(f'pred_{self._bound}', operand)
+        self._bound += 1
+        return param
+
+    def _with_attribute(self, key: str, condition=None):
+        """Entities having the attribute key (with a value satisfying condition).
+
+        A semi-join on the attribute table instead of a correlated EXISTS: the sub-select is answered by the
+        typed (key, <type>_value)-indexes and evaluated once, not per entity."""
+        attribute_class = self._orm_class._attribute_class
+        ids = select(attribute_class.event_id).where(attribute_class.key == key)
+        if condition is not None:
+            ids = ids.where(condition)
+        return self._orm_class.id.in_(ids)
 
     def _visit_comparison(self, comp: Comparison):
         if not type(comp._lhs) in [Field, Attribute]:
             raise AttributeError('Invalid LHS operand instance.')
 
-        rhs = self._visit_literal(comp._rhs)
-
-        op_map = {
-            '==': __eq__,
-            '!=': __ne__,
-            '<': __lt__,
-            '<=': __le__,
-            '>': __gt__,
-            '>=': __ge__,
-        }
-        if comp._op not in op_map:
+        if comp._op not in _op_map:
             raise AttributeError('Invalid comparison operator.')
 
         if isinstance(comp._lhs, Field):
             lhs = getattr(self._orm_class, comp._lhs.value)
-            return op_map[comp._op](lhs, rhs)
+            return _op_map[comp._op](lhs, self._visit_literal(comp._rhs))
 
         elif isinstance(comp._lhs, Attribute):
-            return self._orm_class.attributes.any(
-                and_(self._orm_class._attribute_class.key == comp._lhs.value,
-                     op_map[comp._op](self._orm_class._attribute_class.value, rhs)))
+            value = self._orm_class._attribute_class.value
+            return self._with_attribute(comp._lhs.value, _op_map[comp._op](value, self._visit_literal(comp._rhs)))
+
+    def _visit_same_attribute(self, same: SameAttribute):
+        key = same._comparisons[0]._lhs
+        if any(c._lhs != key or not isinstance(c._lhs, Attribute) or c._op not in _op_map for c in same._comparisons):
+            raise AttributeError('Invalid comparison of SameAttribute.')
+
+        value = self._orm_class._attribute_class.value
+        conditions = [_op_map[c._op](value, self._visit_literal(c._rhs)) for c in same._comparisons]
+        combined = and_(*conditions) if same._combinator is All else or_(*conditions)
+
+        return self._with_attribute(key.value, combined)
 
     def _visit_all(self, all_: All):
-        return and_(self.visit_predicate(pred) for pred in all_._predicates)
+        return and_(true(), *[self.visit_predicate(pred) for pred in all_._predicates])
 
     def _visit_any(self, any_: Any):
-        return or_(self.visit_predicate(pred) for pred in any_._predicates)
+        return or_(false(), *[self.visit_predicate(pred) for pred in any_._predicates])
 
     def _visit_not(self, not__: Not):
         return not_(self.visit_predicate(not__._operand))
 
     def _visit_has(self, has_: Has):
-        return self._orm_class.attributes.any(
-            and_(self._orm_class._attribute_class.key == has_._operand.value,
-                 self._orm_class._attribute_class.value is not None))
+        return self._with_attribute(has_._operand.value)
 
     def _visit_match(self, match_: Match):
         if not type(match_._lhs) in [Field, Attribute]:
@@ -73,13 +102,110 @@ class PredicateVisitor:
             raise AttributeError('Invalid RHS operand instance - expected str.')
 
         if isinstance(match_._lhs, Field):
-            lhs = getattr(self._orm_class, match_._lhs.value)
-            return lhs.regexp_match(match_._rhs)
+            return self._matching(getattr(self._orm_class, match_._lhs.value), match_._rhs)
 
         elif isinstance(match_._lhs, Attribute):
-            return self._orm_class.attributes.any(
-                and_(self._orm_class._attribute_class.key == match_._lhs.value,
-                     self._orm_class._attribute_class.value.regexp_match(match_._rhs)))
+            value = self._orm_class._attribute_class.value._column(match_._rhs)  # only strings are matched
+            return self._with_attribute(match_._lhs.value, self._matching(value, match_._rhs))
+
+    @staticmethod
+    def _matching(column, pattern: str):
+        """column matching the regex pattern, behind prefilters which need no regex (in SQLite a call to Python
+        per row): the literal prefix of an anchored pattern as range (answered by an index of column, assumes
+        code point order of the text, the default collation of SQLite) and the other literals the match has to
+        contain as LIKE. They are part of the shape of Match, their values are not bound as pred_<n>.
+
+        The range only for text columns: compared to a column of numeric affinity (DATETIME) SQLite converts a
+        numeric prefix ('2020') to a number, which orders before any text."""
+        prefix, substrings = required_literals(pattern)
+
+        conditions = []
+        if prefix and isinstance(column.type, String):
+            conditions += [column >= prefix]
+            successor = prefix_successor(prefix)
+            if successor is not None:
+                conditions += [column < successor]
+        conditions += [column.contains(s, autoescape=True) for s in substrings]
+
+        return and_(*conditions, column.regexp_match(pattern))
+
+    def _visit_search(self, search: Search):
+        if not type(search._lhs) in [Field, Attribute]:
+            raise AttributeError('Invalid LHS operand instance - expected Field or Attribute.')
+
+        if not type(search._rhs) == str:
+            raise AttributeError('Invalid RHS operand instance - expected str.')
+
+        words = search.words()
+        if not words:
+            raise AttributeError('Invalid RHS operand - expected at least one word.')
+
+        if isinstance(search._lhs, Field):
+            column = getattr(self._orm_class, search._lhs.value)
+            index = orm.fulltext_index(column) if self._fulltext_index else None
+            if index is None:
+                return self._containing(column, words)
+            return self._orm_class.id.in_(select(index.c.rowid).where(self._searching(index.c[column.name], words)))
+
+        elif isinstance(search._lhs, Attribute):
+            attribute_class = self._orm_class._attribute_class
+            if not self._fulltext_index:
+                return self._with_attribute(search._lhs.value, self._containing(attribute_class.char_value, words))
+            # only the index: joined with the attributes SQLite would rather scan the rows of the key
+            index = orm.fulltext_index(attribute_class.char_value)
+            ids = select(index.c.event_id).where(self._searching(index.c.char_value, words),
+                                                 index.c.key == search._lhs.value)
+            return self._orm_class.id.in_(ids)
+
+    @staticmethod
+    def _searching(text, words: List[str]):
+        """text, a column of a full-text index, containing the words - each quoted as FTS5 string: a word is never
+        taken for an operator."""
+        return text.match(' '.join(f'"{w}"' for w in words))
+
+    @staticmethod
+    def _containing(column, words: List[str]):
+        """column containing the (lower-cased) words without full-text index: a REGEXP per word, behind LIKE
+        (case-insensitive for ASCII only in SQLite, thus not for other words)."""
+        conditions = [column.contains(w, autoescape=True) for w in words if w.isascii()]
+        conditions += [column.regexp_match(rf'(?i)(?<![^\W_]){re.escape(w)}(?![^\W_])') for w in words]
+        return and_(*conditions)
+
+    def _visit_overlaps(self, overlaps: Overlaps):
+        if self._orm_class is not orm.Event:
+            raise AttributeError('Overlaps can only be applied to events.')
+
+        if type(overlaps._start) != dt.datetime or type(overlaps._end) != dt.datetime:
+            raise AttributeError('Invalid operand instance - expected datetime.')
+
+        start = self._visit_literal(overlaps._start)
+        end = self._visit_literal(overlaps._end)
+
+        exact = and_(orm.Event.start <= end, orm.Event.end >= start)
+        if not self._interval_index:
+            return exact
+
+        interval = orm.events_interval_table
+        candidates = select(interval.c.id).where(interval.c.t_start <= orm.epoch(end),
+                                                 interval.c.t_end >= orm.epoch(start))
+        return and_(orm.Event.id.in_(candidates), exact)
+
+    def _visit_any_event(self, any_event: AnyEvent):
+        if self._orm_class is not orm.Catalogue:
+            raise AttributeError('AnyEvent can only be applied to catalogues.')
+
+        # the operand is translated for events by this visitor, its literals are bound in order
+        self._orm_class = orm.Event
+        try:
+            condition = self.visit_predicate(any_event._operand)
+        finally:
+            self._orm_class = orm.Catalogue
+
+        # semi-join of the matching events through the association table
+        membership = orm.event_in_catalogue_association_table
+        return orm.Catalogue.id.in_(select(membership.c.catalogue_id)
+                                    .join(orm.Event, orm.Event.id == membership.c.event_id)
+                                    .where(condition))
 
     def visit_predicate(self, pred: Predicate):
         if isinstance(pred, Comparison):
@@ -94,111 +220,692 @@ class PredicateVisitor:
             return self._visit_has(pred)
         elif isinstance(pred, Match):
             return self._visit_match(pred)
+        elif isinstance(pred, Search):
+            return self._visit_search(pred)
+        elif isinstance(pred, Overlaps):
+            return self._visit_overlaps(pred)
+        elif isinstance(pred, SameAttribute):
+            return self._visit_same_attribute(pred)
+        elif isinstance(pred, AnyEvent):
+            return self._visit_any_event(pred)
         else:
-            raise NotImplemented('Unexpected predicated instance.')
+            raise NotImplementedError('Unexpected predicated instance.')
 
 
-class _Backend:
-    def __init__(self, url: str):
-        # self.engine = create_engine(url, echo=True)
-        self.engine = create_engine(url)
-        orm.Base.metadata.create_all(self.engine)
+class CompiledPredicates:
+    """LRU of the SQL expressions of predicates keyed on their shape.
+
+    Predicates are optimized first (see catalogue.optimizer). A predicate differing from a cached one only in its
+    literal values (e.g. a sliding time window) re-uses the expression, the statement then also hits SQLAlchemy's
+    compiled cache. The expression carries the literals of the predicate it was built for: the returned
+    parameters have to be applied to the statement using it.
+    """
 
-        self.session = Session(bind=self.engine)
+    def __init__(self, size: int = 256):
+        self._size = size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, orm_class: Union[orm.Event, orm.Catalogue], interval_index: bool, fulltext_index: bool,
+            pred: Predicate):
+        pred = optimize(pred)
+        key = orm_class, interval_index, fulltext_index, pred.shape()
+
+        with self._lock:
+            expression = self._cache.get(key)
+            if expression is not None:
+                self._cache.move_to_end(key)
+
+        if expression is None:  # built outside of the lock, a concurrent miss builds the same expression
+            expression = PredicateVisitor(orm_class, interval_index, fulltext_index).visit_predicate(pred)
+            with self._lock:
+                self._cache[key] = expression
+                if len(self._cache) > self._size:
+                    self._cache.popitem(last=False)
+
+        return expression, {f'pred_{i}': v for i, v in enumerate(pred.literals())}
+
+
+compiled_predicates = CompiledPredicates()
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')  # readers do not block the writer and the writer not the readers
+    cursor.execute('PRAGMA busy_timeout=30000')  # writers wait for each other instead of failing
+    cursor.close()
+
+
+def _sqlite_functions(dbapi_connection, connection_record):
+    # replaces SQLAlchemy's REGEXP (re.search() per row) by one re-using compiled patterns
+    dbapi_connection.create_function('regexp', 2, regexp, deterministic=True)
+
+
+def _create_engine(url: str, create=create_engine, **kwargs):
+    """Engine with a connection pool shared by the sessions of all threads (or tasks), SQLite-files are used in
+    WAL-mode.
+
+    An in-memory SQLite-database exists per connection, it stays on SQLAlchemy's default pool (one connection per
+    thread): it is only usable from the thread which created the backend.
+    """
+    url = make_url(url)
+    sqlite = url.get_backend_name() == 'sqlite'
+    if sqlite and url.database in [None, '', ':memory:']:
+        engine = create(url, **kwargs)
+    else:
+        engine = create(url, pool_size=8, max_overflow=24, pool_timeout=60, **kwargs)
+        if sqlite:
+            event.listen(getattr(engine, 'sync_engine', engine), 'connect', _sqlite_pragmas)
+
+    if sqlite:
+        event.listen(getattr(engine, 'sync_engine', engine), 'connect', _sqlite_functions)
+    return engine
+
+
+def _create_schema(connection, fulltext_index: bool = False) -> Tuple[bool, bool]:
+    """Creates the missing tables and indexes (the full-text indexes only if fulltext_index), returns whether the
+    interval index and the full-text indexes are available."""
+    orm.Base.metadata.create_all(connection)
+    configure_mappers()  # sets up type_map of the attribute classes, needed to build queries
+    orm.add_membership_primary_key(connection)
+    orm.make_event_uuids_unique(connection)
+    orm.create_missing_indexes(connection)
+    orm.migrate_pickled_predicates(connection)
+    return orm.create_interval_index(connection), \
+        orm.create_fulltext_index(connection) if fulltext_index else orm.has_fulltext_index(connection)
+
+
+def _insert_rows(session: Session, rows: List[Tuple[Dict, Dict]]) -> List[int]:
+    """Insert events given as (fields, attributes) with Core-tables (not ORM-enabled inserts) for plain
+    executemany/insertmanyvalues, returns their ids."""
+    events_table = orm.Event.__table__
+    ids = session.execute(insert(events_table).returning(events_table.c.id, sort_by_parameter_order=True),
+                          [fields for fields, _ in rows]).scalars().all()
+
+    attributes = [dict(event_id=id_, key=k, **orm.EventAttributes.value_columns(v))
+                  for (_, event_attributes), id_ in zip(rows, ids)
+                  for k, v in event_attributes.items()]
+    if attributes:
+        session.execute(insert(orm.EventAttributes.__table__), attributes)
+    return ids
+
+
+def _event_ids(session: Session, uuids: List[str]) -> Dict[str, int]:
+    """Ids of the stored events of uuids, by uuid."""
+    events_table = orm.Event.__table__
+    return dict(session.execute(select(events_table.c.uuid, events_table.c.id)
+                                .where(events_table.c.uuid.in_(set(uuids)))).all())
+
+
+def _insert_events(session: Session, events: List[Event], batch_size: int = 10000):
+    """Bulk insert never persisted events (executemany of Core-inserts), bypassing the unit-of-work.
+
+    Instead of an ORM-entity each event is given the id of its row as a handle, the entity is loaded from it
+    when needed (see _Backend._entity()). An event of a uuid already stored (or twice in events) is a ValueError:
+    the uuid identifies the row of an event.
+    """
+    for i in range(0, len(events), batch_size):
+        batch = events[i:i + batch_size]
+
+        uuids = [e.uuid for e in batch]
+        conflicts = set(_event_ids(session, uuids)) | {u for u, n in Counter(uuids).items() if n > 1}
+        if conflicts:
+            raise ValueError(f'Events with uuid {", ".join(sorted(conflicts))} exist already or are given twice.')
+
+        ids = _insert_rows(session, [(dict(start=e.start, end=e.end, author=e.author, uuid=e.uuid),
+                                      e.variable_attributes_as_dict()) for e in batch])
+
+        for e, id_ in zip(batch, ids):
+            e._backend_id = id_
+
+
+def _update_events(session: Session, events: List[Tuple[int, Event, Set[str]]]):
+    """Write the modified keys of persisted events, given as (id, event, keys), with Core-statements: an UPDATE of
+    the modified fields, the rows of modified attributes are deleted and those still set re-inserted."""
+    events_table = orm.Event.__table__
+    attributes_table = orm.EventAttributes.__table__
+
+    attributes = []
+    for id_, e, keys in events:
+        fields = {k: e.__dict__[k] for k in keys if k in Event._fixed_keys}
+        if fields:
+            session.execute(update(events_table).where(events_table.c.id == id_).values(**fields))
+
+        modified = sorted(keys.difference(Event._fixed_keys))
+        if modified:
+            session.execute(delete(attributes_table).where(attributes_table.c.event_id == id_,
+                                                           attributes_table.c.key.in_(modified)))
+            attributes += [dict(event_id=id_, key=k, **orm.EventAttributes.value_columns(e.__dict__[k]))
+                           for k in modified if k in e.__dict__]
+
+    if attributes:
+        session.execute(insert(attributes_table), attributes)
+
+
+def _write_membership(session: Session, catalogue_id: int, added: Set[int], removed: Set[int],
+                      batch_size: int = 10000):
+    """Add and remove events (by id) to and from a catalogue with Core-statements on the association table, the
+    events of the catalogue are not loaded - only which of the added ones are already in, looked up in the index of
+    the association table: adding to a large catalogue does not read all of its events."""
+    membership = orm.event_in_catalogue_association_table
+
+    removed = sorted(removed)
+    for i in range(0, len(removed), batch_size):
+        session.execute(delete(membership).where(membership.c.catalogue_id == catalogue_id,
+                                                 membership.c.event_id.in_(removed[i:i + batch_size])))
+
+    added = sorted(added)
+    for i in range(0, len(added), batch_size):
+        batch = added[i:i + batch_size]
+        present = set(session.execute(
+            select(membership.c.event_id).where(membership.c.catalogue_id == catalogue_id,
+                                                membership.c.event_id.in_(batch))).scalars())
+        rows = [dict(event_id=id_, catalogue_id=catalogue_id) for id_ in batch if id_ not in present]
+        if rows:
+            session.execute(insert(membership), rows)
+
+
+def _named_catalogue(session: Session, name: str, author: str) -> int:
+    """Id of the (first) catalogue named name, created by author if there is none."""
+    catalogues = orm.Catalogue.__table__
+    id_ = session.execute(select(catalogues.c.id).where(catalogues.c.name == name)
+                          .order_by(catalogues.c.id).limit(1)).scalar()
+    if id_ is None:
+        id_, = session.execute(insert(catalogues).values(name=name, author=author)).inserted_primary_key
+    return id_
+
+
+def _import_rows(session: Session, catalogue_id: int, rows: List[Tuple[Dict, Dict]],
+                 batch_size: int = 10000) -> Tuple[Set[int], List[int]]:
+    """Add events given as (fields, attributes) to a catalogue, returns the ids of the events and of those inserted.
+    Only events of unknown uuids are inserted (the first of a uuid given twice), a stored event is added as it is:
+    importing a file again or into another catalogue does not duplicate its events."""
+    ids, inserted = set(), []
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        known = _event_ids(session, [fields['uuid'] for fields, _ in batch])
+
+        new = {}
+        for fields, attributes in batch:
+            if fields['uuid'] not in known:
+                new.setdefault(fields['uuid'], (fields, attributes))
+        new_ids = _insert_rows(session, list(new.values())) if new else []
+
+        ids.update(known.values(), new_ids)
+        inserted += new_ids
+    _write_membership(session, catalogue_id, ids, set(), batch_size)
+    return ids, inserted
+
+
+def _events_of_catalogue(catalogue_id: int):
+    """Filter of the events of a catalogue, a lookup in the index of the association table instead of an EXISTS
+    per event."""
+    membership = orm.event_in_catalogue_association_table
+    return orm.Event.id.in_(select(membership.c.event_id).where(membership.c.catalogue_id == catalogue_id))
+
+
+def _catalogues_of_event(event_id: int):
+    membership = orm.event_in_catalogue_association_table
+    return orm.Catalogue.id.in_(select(membership.c.catalogue_id).where(membership.c.event_id == event_id))
+
+
+def _catalogues_of_events(event_ids: List[int]):
+    """(event id, catalogue entity)-statement of the catalogues the events are in."""
+    membership = orm.event_in_catalogue_association_table
+    return select(membership.c.event_id, orm.Catalogue) \
+        .join(membership, membership.c.catalogue_id == orm.Catalogue.id) \
+        .where(membership.c.event_id.in_(event_ids)) \
+        .order_by(orm.Catalogue.name, orm.Catalogue.id) \
+        .options(selectinload(orm.Catalogue.attributes))
+
+
+_orderable = {
+    orm.Event: ['start', 'end', 'author', 'uuid', 'id'],
+    orm.Catalogue: ['name', 'author', 'id'],
+}
+
+
+def _keyset(q, orm_class: Union[orm.Event, orm.Catalogue], limit: int, after: str, order_by: Sequence[str]):
+    """Keyset pagination of the Query or select q: ordered by order_by (made unique with the id) and starting after
+    the row of the cursor after - by an index range instead of skipping rows with OFFSET.
+
+    Returns the paginated q and the effective order_by."""
+    order_by = tuple(order_by)
+    if 'id' not in order_by:
+        order_by += ('id',)
+
+    if any(name not in _orderable[orm_class] for name in order_by):
+        raise AttributeError('Invalid order_by column.')
+
+    columns = [getattr(orm_class, name) for name in order_by]
+    if after is not None:
+        q = q.filter(tuple_(*columns) > tuple_(*decode_cursor(after, order_by)))
+
+    q = q.order_by(*columns)
+    if limit is not None:
+        q = q.limit(limit)
+    return q, order_by
+
+
+def _page(instances: list, entities: list, limit: int, order_by: Sequence[str]) -> Page:
+    """The page of instances, with the cursor after the last entity if there may be more."""
+    cursor = None
+    if entities and limit is not None and len(entities) == limit:
+        cursor = encode_cursor(order_by, [getattr(entities[-1], name) for name in order_by])
+    return Page(instances, cursor)
 
-    def save_catalogue(self, catalogue: Catalogue):
-        serialized_predicate = pickle.dumps(catalogue.predicate, protocol=3)
-        entity = getattr(catalogue, "_backend_entity", None)
 
-        if entity:  # update
-            entity.name = catalogue.name
-            entity.author = catalogue.author
-            entity.predicate = serialized_predicate
+class _Backend:
+    """Synchronous backend, usable from several threads.
+
+    Each thread works with its own session (see scoped_session) on a connection of the pool of the engine. Reads
+    end their transaction, returning the connection to the pool, unless the thread has uncommitted writes.
+    Entities of an instance loaded by another thread are re-loaded in the session of the current thread.
+
+    With fulltext_index the full-text indexes used by Search are created (SQLite with FTS5), they slow down
+    inserts. Without, Search is answered by LIKE and REGEXP - unless the database already has them.
+    """
+
+    def __init__(self, url: str, fulltext_index: bool = False):
+        # self.engine = _create_engine(url, echo=True)
+        self.engine = _create_engine(url)
+        with self.engine.begin() as connection:
+            self._interval_index, self._fulltext_index = _create_schema(connection, fulltext_index)
+
+        # not expired on commit: ending a read should not cause the next access to reload everything
+        self.session = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False))
+
+        self.materialized = MaterializedResults()
+        self.identity_map = IdentityMap()
+        self._local = threading.local()
+
+    @property
+    def _written(self) -> list:
+        """(instance, written keys or None if new) written by this thread since its last commit, marked clean and
+        used to update the materialized results on commit"""
+        if not hasattr(self._local, 'written'):
+            self._local.written = []
+        return self._local.written
+
+    @_written.setter
+    def _written(self, written: list):
+        self._local.written = written
+
+    def _end_read(self):
+        session = self.session()
+        if not (self._written or session.new or session.dirty or session.deleted):
+            session.commit()
+
+    def save_catalogue(self, catalogue: Catalogue):
+        persisted = self.is_persisted(catalogue)
+        if persisted and not catalogue.is_modified():
+            return
+
+        keys = set(catalogue._dirty)
+        self._written += [(catalogue, keys if persisted else None)]
+
+        entity = self._entity(catalogue, orm.Catalogue)
+        if entity is not None:  # update (entities with no attributes are falsy), only what has been modified
+            if 'name' in keys:
+                entity.name = catalogue.name
+            if 'author' in keys:
+                entity.author = catalogue.author
+            if 'predicate' in keys:
+                entity.predicate = orm.encoded_predicate(catalogue.predicate)
+            keys.difference_update(Catalogue._fixed_keys)
         else:
-            entity = orm.Catalogue(catalogue.name, catalogue.author, serialized_predicate)
+            entity = orm.Catalogue(catalogue.name, catalogue.author, orm.encoded_predicate(catalogue.predicate))
             catalogue._backend_entity = entity
-
-        # need to use []-operator because of proxy-class in sqlalchemy - update() on __dict__ does not work
-        for k, v in catalogue.variable_attributes_as_dict().items():
-            entity[k] = v
-
-        for e in catalogue._removed_events:
-            event_entity = getattr(e, "_backend_entity", None)
-            if event_entity:  # event has already been added to the ORM
-                entity.events.remove(event_entity)
-            else:  # event has not yet been added to the ORM but is about to be added
-                if e in catalogue._added_events:
-                    catalogue._added_events.remove(e)
-
-        for e in catalogue._added_events:
-            if not hasattr(e, "_backend_entity"):
-                self.save_event(e)
-            entity.events.append(e._backend_entity)
+            keys = catalogue.variable_attributes_as_dict().keys()
 
         self.session.add(entity)
 
-    def save_event(self, event: Event):
-        entity = getattr(event, "_backend_entity", None)
+        # need to use []-operator because of proxy-class in sqlalchemy - update() on __dict__ does not work
+        for k in keys:
+            if k in catalogue.__dict__:
+                entity[k] = catalogue.__dict__[k]
+            elif k in entity:
+                del entity[k]
 
-        if entity:  # update
-            entity.start = event.start
-            entity.end = event.end
-            entity.author = event.author
-            entity.uuid = event.uuid
-        else:  # insert
-            entity = orm.Event(event.start, event.end, event.author, event.uuid)
-            event._backend_entity = entity
+        new_events = [e for e in catalogue._added_events.values() if not self.is_persisted(e)]
+        self.insert_events(new_events)
 
-        # need to use []-operator because of proxy-class in sqlalchemy - update() on __dict__ does not work
-        for k, v in event.variable_attributes_as_dict().items():
-            entity[k] = v
+        self.session.flush()  # the id of a new catalogue
+        _write_membership(self.session, entity.id,
+                          {self._id(e) for e in catalogue._added_events.values()},
+                          {self._id(e) for e in catalogue._removed_events.values() if self.is_persisted(e)})
+        self.session.expire(entity, ['events'])  # if loaded, it is stale now
 
-        self.session.add(entity)
+    def save_event(self, event: Event):
+        """Insert a new event, or write what has been modified of a persisted one (nothing if it is unmodified)."""
+        if not self.is_persisted(event):
+            self.insert_events([event])
+            return
+
+        if not event.is_modified():
+            return
+
+        keys = set(event._dirty)
+        _update_events(self.session, [(self._id(event), event, keys)])
+        self._written += [(event, keys)]
+
+        entity = getattr(event, '_backend_entity', None)
+        if entity is not None and object_session(entity) is self.session():  # the loaded state is stale now
+            self.session.expire(entity)
+
+    def insert_events(self, events: List[Event], batch_size: int = 10000):
+        _insert_events(self.session, events, batch_size)
+        self._written += [(e, None) for e in events]
+
+    def import_events(self, chunks: Iterable[List[Tuple[Dict, Dict]]], catalogue_name: str, author: str) -> int:
+        """Insert the events of chunks of (fields, attributes) into the catalogue named catalogue_name (created by
+        author if there is none), a transaction per chunk: no Event-objects are created and a chunk is released
+        once written, events of stored uuids are only added (see _import_rows()). A failure leaves the chunks before
+        it imported. Returns the number of imported events."""
+        catalogue_id = _named_catalogue(self.session, catalogue_name, author)
+        self.commit()
+
+        count = 0
+        for rows in chunks:
+            try:
+                ids, inserted = _import_rows(self.session, catalogue_id, rows)
+            except Exception:
+                self.rollback()  # the session stays usable
+                raise
+            self.commit()
+            if inserted:
+                self._materialize_imported(min(inserted), max(inserted))
+            count += len(ids)
+        return count
+
+    def _materialize_imported(self, first: int, last: int):
+        # imported events are not evaluated in memory (there are no Event-objects), the database finds the
+        # matching ones in their range of ids
+        for predicate in self.materialized.predicates():
+            f, params = compiled_predicates.get(orm.Event, self._interval_index, self._fulltext_index, predicate)
+            ids = self.session.execute(select(orm.Event.id).where(orm.Event.id.between(first, last), f), params)
+            self.materialized.add_ids(predicate, ids.scalars().all())
+        self._end_read()
+
+    @staticmethod
+    def is_persisted(instance: Union[Event, Catalogue]) -> bool:
+        return hasattr(instance, '_backend_entity') or hasattr(instance, '_backend_id')
+
+    @staticmethod
+    def _id(instance: Union[Event, Catalogue]) -> int:
+        if hasattr(instance, '_backend_id'):
+            return instance._backend_id
+
+        # from the identity, accessing the entity is not safe if it belongs to the session of another thread
+        identity = inspect(instance._backend_entity).identity
+        return identity[0] if identity else instance._backend_entity.id
+
+    def _entity(self, instance: Union[Event, Catalogue], orm_class: Union[orm.Event, orm.Catalogue]):
+        entity = getattr(instance, '_backend_entity', None)
+        if entity is not None and object_session(entity) not in [None, self.session()]:
+            entity = None  # loaded by another thread
+
+        if entity is None and self.is_persisted(instance):  # bulk inserted or of another thread, load by its id
+            entity = self.session.get(orm_class, self._id(instance))
+            instance._backend_entity = entity
+        return entity
+
+    def get_catalogues(self, base: Union[Event, Predicate] = None,
+                       limit: int = None, after: str = None, order_by: Sequence[str] = ('name', 'id'),
+                       events: List[Event] = None) -> Union[List[Catalogue], Dict[str, List[Catalogue]]]:
+        if events is not None:
+            if base is not None or limit is not None or after is not None:
+                raise AttributeError('events cannot be combined with base or pagination.')
+            return self._catalogues_of_events(events)
 
-    def get_catalogues(self, base: Union[Event, Predicate] = None) -> List[Catalogue]:
         if base:
-            if isinstance(base, Predicate):
-                raise NotImplemented('Predicate is not yet implemented')
+            if isinstance(base, Predicate):  # on name, author, attributes and with AnyEvent on the events
+                f, params = compiled_predicates.get(orm.Catalogue, self._interval_index, self._fulltext_index, base)
+                q = self.session.query(orm.Catalogue).filter(f).params(**params)
             elif isinstance(base, Event):  # catalogues of an Event
-                q = self.session.query(orm.Catalogue).filter(orm.Catalogue.events.any(id=base._backend_entity.id))
+                q = self.session.query(orm.Catalogue).filter(_catalogues_of_event(self._id(base)))
             else:
                 raise AttributeError('Invalid instance of given base object.')
         else:
             q = self.session.query(orm.Catalogue)
 
-        catalogues = []
-        for c in q.all():
-            attr = {v.key: v.value for _, v in c.attributes.items()}
-            catalogue = Catalogue(c.name, c.author, predicate=pickle.loads(c.predicate), **attr)
-            catalogue._backend_entity = c
-            catalogues += [catalogue]
+        paginated = limit is not None or after is not None
+        if paginated:
+            q, order_by = _keyset(q, orm.Catalogue, limit, after, order_by)
 
-        return catalogues
+        # the attributes are loaded with an IN on the primary keys of the loaded catalogues (instead of a query per
+        # catalogue), the filter of base is not run again
+        q = q.options(selectinload(orm.Catalogue.attributes))
 
-    def get_events(self, base: Catalogue = None) -> List[Event]:
+        entities = q.populate_existing().all()
+        catalogues = [self._catalogue_from_entity(c) for c in entities]
+        self._end_read()
+
+        return _page(catalogues, entities, limit, order_by) if paginated else catalogues
+
+    def _catalogues_of_events(self, events: List[Event], batch_size: int = 10000) -> Dict[str, List[Catalogue]]:
+        """{uuid: catalogues} of the events, with one query per batch_size events (and one for the attributes of
+        the catalogues). A catalogue is the same instance in the lists of all its events."""
+        result = {e.uuid: [] for e in events}
+        uuids = {self._id(e): e.uuid for e in events if self.is_persisted(e)}
+        ids = sorted(uuids)
+
+        catalogues = {}
+        for i in range(0, len(ids), batch_size):
+            rows = self.session.execute(_catalogues_of_events(ids[i:i + batch_size]),
+                                        execution_options={'populate_existing': True})
+            for event_id, entity in rows:
+                if entity.id not in catalogues:
+                    catalogues[entity.id] = self._catalogue_from_entity(entity)
+                result[uuids[event_id]] += [catalogues[entity.id]]
+        self._end_read()
+
+        return result
+
+    def _events_query(self, base: Union[Catalogue, Predicate] = None):
         if base:
-            if isinstance(base, Catalogue):
+            if isinstance(base, Predicate):
+                f, params = compiled_predicates.get(orm.Event, self._interval_index, self._fulltext_index, base)
+                return self.session.query(orm.Event).filter(f).params(**params)
+            elif isinstance(base, Catalogue):
                 if base.predicate:  # "smart catalogue"
-                    f = PredicateVisitor(orm.Event).visit_predicate(base.predicate)
-                    q = self.session.query(orm.Event).filter(f)
+                    ids = self.materialized.ids(base.predicate)
+                    if ids is not None:  # ids rendered inline, there can be more than bound parameters are allowed
+                        return self.session.query(orm.Event).filter(
+                            orm.Event.id.in_(bindparam('ids', sorted(ids), expanding=True, literal_execute=True)))
+
+                    return self._events_query(base.predicate)
                 else:
-                    q = self.session.query(orm.Event).filter(orm.Event.catalogues.any(id=base._backend_entity.id))
+                    return self.session.query(orm.Event).filter(_events_of_catalogue(self._id(base)))
             else:
                 raise AttributeError('Invalid instance of given base object.')
         else:
-            q = self.session.query(orm.Event)
-
-        events = []
-        for e in q:
-            attr = {v.key: v.value for _, v in e.attributes.items()}
-            event = Event(e.start, e.end, e.author, e.uuid, **attr)
-            event._backend_entity = e
-            events += [event]
-
-        return events
+            return self.session.query(orm.Event)
+
+    def get_events(self, base: Union[Catalogue, Predicate] = None,
+                   limit: int = None, after: str = None, order_by: Sequence[str] = ('start', 'id')) -> List[Event]:
+        """All events of base, or a Page of at most limit of them ordered by order_by and continuing after the
+        cursor of the previous page."""
+        q = self._events_query(base)
+
+        paginated = limit is not None or after is not None
+        if paginated:
+            q, order_by = _keyset(q, orm.Event, limit, after, order_by)
+
+        # the attributes are loaded with an IN on the primary keys of the loaded events (instead of a query per
+        # event), the filter of base is not run again
+        q = q.options(selectinload(orm.Event.attributes))
+
+        # populate_existing: entities already in the session of this thread may have been changed by another one
+        entities = q.populate_existing().all()
+        events = [self._event_from_entity(e) for e in entities]
+        self._end_read()
+
+        return _page(events, entities, limit, order_by) if paginated else events
+
+    def iter_events(self, base: Catalogue = None, chunk_size: int = 1000) -> Iterator[Event]:
+        # rows are fetched chunk-wise from a server-side cursor, attributes with one IN-query per chunk
+        q = self._events_query(base) \
+            .options(selectinload(orm.Event.attributes)) \
+            .populate_existing() \
+            .yield_per(chunk_size)
+
+        chunk = []
+        try:
+            for e in q:
+                chunk += [e]
+                yield self._event_from_entity(e)
+
+                if len(chunk) == chunk_size:
+                    self._expunge_events(chunk)
+                    chunk = []
+        finally:  # also when the iteration is not exhausted (break, an exception or the generator is closed)
+            self._expunge_events(chunk)
+            self._end_read()
+
+    def _expunge_events(self, entities: List[orm.Event]):
+        # detach already yielded entities (and their attributes) so that the session does not hold on to them,
+        # they are re-attached by save_event() if needed
+        for e in entities:
+            for a in e.attributes.values():
+                self.session.expunge(a)
+            self.session.expunge(e)
+
+    def _event_rows(self, base: Union[Catalogue, Predicate] = None):
+        """The events of base as (id, uuid, start, end, author)-rows ordered by id and an iterator of their attributes
+        as (event_id, key, value)-rows, read without ORM hydration."""
+        q = self._events_query(base)
+        events = q.with_entities(orm.Event.id, orm.Event.uuid, orm.Event.start, orm.Event.end, orm.Event.author) \
+            .order_by(orm.Event.id).all()
+
+        ea = orm.EventAttributes
+        value_columns, value = self._attribute_values(ea)
+        attributes = q.join(orm.Event.attributes).with_entities(ea.event_id, ea.key, ea.type, *value_columns)
+
+        return events, ((event_id, key, value(type_, values)) for event_id, key, type_, *values in attributes)
+
+    def get_columns(self, base: Union[Catalogue, Predicate] = None):
+        """Columnar snapshot (see catalogue.columnar) of the events of base, read without ORM hydration."""
+        from ..columnar import EventColumns  # numpy is only needed here
+
+        columns = EventColumns(*self._event_rows(base))
+        self._end_read()
+        return columns
+
+    def get_event_batch(self, base: Union[Catalogue, Predicate] = None) -> EventBatch:
+        """The events of base in compact storage (see catalogue.batch), read without ORM hydration."""
+        batch = EventBatch(*self._event_rows(base))
+        self._end_read()
+        return batch
+
+    @staticmethod
+    def _attribute_values(attribute_class):
+        """The typed value-columns of attribute_class and a function returning the value of an attribute-row
+        from its type and the values of these columns."""
+        fields = sorted({f for f, _ in attribute_class.type_map.values() if f is not None})
+        index = {type_: None if f is None else fields.index(f) for type_, (f, _) in attribute_class.type_map.items()}
+
+        def value(type_: str, values: list):
+            i = index[type_]
+            return None if i is None else values[i]
+
+        return [getattr(attribute_class, f) for f in fields], value
+
+    def count_events(self, base: Union[Catalogue, Predicate] = None) -> int:
+        n = self._events_query(base).with_entities(func.count(orm.Event.id)).scalar()
+        self._end_read()
+        return n
+
+    def time_extent(self, base: Union[Catalogue, Predicate] = None) -> Optional[Tuple[dt.datetime, dt.datetime]]:
+        """Earliest start and latest end of the events of base, None if there are none."""
+        start, end = self._events_query(base) \
+            .with_entities(func.min(orm.Event.start), func.max(orm.Event.end)).one()
+        self._end_read()
+        return None if start is None else (start, end)
+
+    def attribute_value_counts(self, base: Union[Catalogue, Predicate], key: str) -> List[Tuple[object, int]]:
+        """(value, number of events) of the values of attribute key of the events of base, most frequent first.
+
+        A list, not a dict: values of different types may be equal in Python (1 == True)."""
+        ea = orm.EventAttributes
+        value_columns, value = self._attribute_values(ea)
+        rows = self._events_query(base).join(orm.Event.attributes).filter(ea.key == key) \
+            .with_entities(ea.type, *value_columns, func.count(ea.event_id)) \
+            .group_by(ea.type, *value_columns) \
+            .order_by(func.count(ea.event_id).desc())
+
+        counts = [(value(type_, values), n) for type_, *values, n in rows]
+        self._end_read()
+        return counts
+
+    @staticmethod
+    def _catalogue_from_entity(c: orm.Catalogue) -> Catalogue:
+        attr = {k: v.value for k, v in c.attributes.items()}
+        catalogue = Catalogue(c.name, c.author, **attr)
+        if c.predicate is not None:
+            catalogue._set_encoded_predicate(c.predicate)
+        catalogue._backend_id = c.id  # the identity of the row, also where the entity is not at hand (batches)
+        catalogue._backend_entity = c
+        catalogue._mark_clean()
+        return catalogue
+
+    def _event_from_entity(self, e: orm.Event) -> Event:
+        attr = {k: v.value for k, v in e.attributes.items()}
+        event = self.identity_map.event(dict(start=e.start, end=e.end, author=e.author, uuid=e.uuid), attr)
+        event._backend_id = e.id  # the identity of the row, also where the entity is not at hand (batches)
+        event._backend_entity = e
+        return event
+
+    def materialize(self, catalogue: Catalogue):
+        """Keep the ids of the events matching the smart catalogue up to date in memory, get_events() then
+        only has to load them by primary key."""
+        if not catalogue.predicate:
+            raise AttributeError('Only smart catalogues can be materialized.')
+
+        if catalogue.predicate not in self.materialized:
+            ids = self._events_query(catalogue).with_entities(orm.Event.id)
+            self.materialized.add(catalogue.predicate, (id_ for id_, in ids))
+            self._end_read()
+
+    def dematerialize(self, catalogue: Catalogue):
+        self.materialized.discard(catalogue.predicate)
+
+    def rebuild_fulltext_index(self):
+        """Re-indexes all rows of the full-text indexes (if there are), needed after a VACUUM of the database."""
+        if self._fulltext_index:
+            orm.rebuild_fulltext_index(self.session.connection())
+            self.commit()
+
+    def rollback(self):
+        """Discards what this thread has written since its last commit."""
+        written, self._written = self._written, []
+        self._rollback(written)
+
+    def _rollback(self, written: list):
+        self.session.rollback()
+
+        # the rows of new instances are gone, they are new again (and still modified)
+        for instance, keys in written:
+            if keys is None:
+                instance.__dict__.pop('_backend_id', None)
+                instance.__dict__.pop('_backend_entity', None)
 
     def commit(self):
-        self.session.commit()
-
-
-backend = _Backend(url='sqlite:///' + str(Path.joinpath(Path.home(), '.space-event-catalogue.sqlite')))
+        written, self._written = self._written, []
+
+        try:
+            self.session.flush()
+            ids = [self._id(instance) for instance, _ in written]  # known after flush
+            self.session.commit()
+        except Exception:
+            self._rollback(written)
+            self.materialized.clear()  # an unknown part has been written
+            raise
+
+        for instance, keys in written:
+            instance._mark_clean(keys)
+            if isinstance(instance, Event):
+                self.identity_map.add(instance)
+
+        self.materialized.update([(id_, instance, keys) for id_, (instance, keys) in zip(ids, written)
+                                  if isinstance(instance, Event)])
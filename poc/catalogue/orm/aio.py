@@ -0,0 +1,289 @@
+from . import orm, compiled_predicates, _create_engine, _create_schema, _insert_events, _update_events, \
+    _write_membership, _events_of_catalogue, _catalogues_of_event, _catalogues_of_events, _named_catalogue, \
+    _import_rows, _keyset, _page, _Backend
+from .identity import IdentityMap
+
+from .. import Event, Catalogue
+from ..filter import Predicate
+
+import asyncio
+
+import datetime as dt
+
+from typing import Union, List, AsyncIterator, Iterable, Sequence, Optional, Tuple, Set, Dict
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+
+class _AsyncBackend:
+    """Backend on SQLAlchemy's asyncio extension.
+
+    Every call uses its own AsyncSession (and connection of the pool), concurrent calls do not wait for each other
+    as long as the database does not. Entities are not kept: the returned Events and Catalogues carry the id of
+    their row, an update loads the entity in the session of the call.
+    """
+
+    def __init__(self, url: str, fulltext_index: bool = False):
+        self.engine = _create_engine(url, create_async_engine)
+        self._sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        # set up by _ready(), the schema can only be created asynchronously
+        self._create_fulltext_index = fulltext_index
+        self._interval_index = self._fulltext_index = None
+        self._setup = asyncio.Lock()
+        self.identity_map = IdentityMap()
+
+    async def _ready(self):
+        if self._interval_index is None:
+            async with self._setup:
+                if self._interval_index is None:
+                    async with self.engine.begin() as connection:
+                        self._interval_index, self._fulltext_index = \
+                            await connection.run_sync(_create_schema, self._create_fulltext_index)
+
+    def _events_statement(self, base: Union[Catalogue, Predicate] = None):
+        if base is None:
+            return select(orm.Event), {}
+
+        if isinstance(base, Predicate):
+            f, params = compiled_predicates.get(orm.Event, self._interval_index, self._fulltext_index, base)
+            return select(orm.Event).where(f), params
+
+        if not isinstance(base, Catalogue):
+            raise AttributeError('Invalid instance of given base object.')
+
+        if base.predicate:  # "smart catalogue"
+            return self._events_statement(base.predicate)
+
+        return select(orm.Event).where(_events_of_catalogue(_Backend._id(base))), {}
+
+    async def get_catalogues(self, base: Union[Event, Predicate] = None,
+                             limit: int = None, after: str = None, order_by: Sequence[str] = ('name', 'id'),
+                             events: List[Event] = None) -> Union[List[Catalogue], Dict[str, List[Catalogue]]]:
+        await self._ready()
+
+        if events is not None:
+            if base is not None or limit is not None or after is not None:
+                raise AttributeError('events cannot be combined with base or pagination.')
+            return await self._catalogues_of_events(events)
+
+        q, params = select(orm.Catalogue), {}
+        if base:
+            if isinstance(base, Predicate):
+                f, params = compiled_predicates.get(orm.Catalogue, self._interval_index, self._fulltext_index,
+                                                    base)
+                q = q.where(f)
+            elif isinstance(base, Event):  # catalogues of an Event
+                q = q.where(_catalogues_of_event(_Backend._id(base)))
+            else:
+                raise AttributeError('Invalid instance of given base object.')
+
+        paginated = limit is not None or after is not None
+        if paginated:
+            q, order_by = _keyset(q, orm.Catalogue, limit, after, order_by)
+
+        async with self._sessions() as session:
+            result = await session.execute(q.options(selectinload(orm.Catalogue.attributes)), params)
+            entities = result.scalars().all()
+
+        catalogues = [self._catalogue_from_entity(c) for c in entities]
+        return _page(catalogues, entities, limit, order_by) if paginated else catalogues
+
+    async def _catalogues_of_events(self, events: List[Event], batch_size: int = 10000) \
+            -> Dict[str, List[Catalogue]]:
+        """See _Backend._catalogues_of_events()."""
+        result = {e.uuid: [] for e in events}
+        uuids = {_Backend._id(e): e.uuid for e in events if _Backend.is_persisted(e)}
+        ids = sorted(uuids)
+
+        catalogues = {}
+        async with self._sessions() as session:
+            for i in range(0, len(ids), batch_size):
+                rows = await session.execute(_catalogues_of_events(ids[i:i + batch_size]))
+                for event_id, entity in rows:
+                    if entity.id not in catalogues:
+                        catalogues[entity.id] = self._catalogue_from_entity(entity)
+                    result[uuids[event_id]] += [catalogues[entity.id]]
+
+        return result
+
+    async def get_events(self, base: Union[Catalogue, Predicate] = None,
+                         limit: int = None, after: str = None, order_by: Sequence[str] = ('start', 'id')) \
+            -> List[Event]:
+        await self._ready()
+
+        q, params = self._events_statement(base)
+
+        paginated = limit is not None or after is not None
+        if paginated:
+            q, order_by = _keyset(q, orm.Event, limit, after, order_by)
+
+        async with self._sessions() as session:
+            result = await session.execute(q.options(selectinload(orm.Event.attributes)), params)
+            entities = result.scalars().all()
+
+        events = [self._event_from_entity(e) for e in entities]
+        return _page(events, entities, limit, order_by) if paginated else events
+
+    async def iter_events(self, base: Catalogue = None, chunk_size: int = 1000) -> AsyncIterator[Event]:
+        await self._ready()
+
+        q, params = self._events_statement(base)
+        q = q.options(selectinload(orm.Event.attributes)).execution_options(yield_per=chunk_size)
+
+        async with self._sessions() as session:
+            result = await session.stream(q, params)
+            async for chunk in result.scalars().partitions():
+                for e in chunk:
+                    yield self._event_from_entity(e)
+
+                # detach the yielded entities so that the session does not hold on to them
+                for e in chunk:
+                    for a in e.attributes.values():
+                        session.expunge(a)
+                    session.expunge(e)
+
+    async def _rows(self, q, params: dict) -> list:
+        async with self._sessions() as session:
+            return (await session.execute(q, params)).all()
+
+    async def count_events(self, base: Union[Catalogue, Predicate] = None) -> int:
+        await self._ready()
+
+        q, params = self._events_statement(base)
+        (n,), = await self._rows(q.with_only_columns(func.count(orm.Event.id)), params)
+        return n
+
+    async def time_extent(self, base: Union[Catalogue, Predicate] = None) \
+            -> Optional[Tuple[dt.datetime, dt.datetime]]:
+        await self._ready()
+
+        q, params = self._events_statement(base)
+        (start, end), = await self._rows(q.with_only_columns(func.min(orm.Event.start), func.max(orm.Event.end)),
+                                            params)
+        return None if start is None else (start, end)
+
+    async def attribute_value_counts(self, base: Union[Catalogue, Predicate], key: str) -> List[Tuple[object, int]]:
+        await self._ready()
+
+        q, params = self._events_statement(base)
+        ea = orm.EventAttributes
+        value_columns, value = _Backend._attribute_values(ea)
+        q = q.join(orm.Event.attributes).where(ea.key == key) \
+            .with_only_columns(ea.type, *value_columns, func.count(ea.event_id)) \
+            .group_by(ea.type, *value_columns) \
+            .order_by(func.count(ea.event_id).desc())
+
+        return [(value(type_, values), n) for type_, *values, n in await self._rows(q, params)]
+
+    async def save(self, events: List[Event], catalogues: List[Catalogue]):
+        await self._ready()
+
+        # never persisted events (also those only added to a catalogue) go through the bulk insert path
+        new_events = {id(e): e for e in events if not _Backend.is_persisted(e)}
+        new_events.update((id(e), e) for c in catalogues for e in c._added_events.values()
+                          if not _Backend.is_persisted(e))
+
+        # of the persisted ones only the modified keys are written, unmodified instances are skipped
+        modified = [(_Backend._id(e), e, set(e._dirty)) for e in {id(e): e for e in events}.values()
+                    if id(e) not in new_events and e.is_modified()]
+        catalogues = [(c, set(c._dirty)) for c in catalogues if not _Backend.is_persisted(c) or c.is_modified()]
+
+        new_catalogues = [c for c, _ in catalogues if not _Backend.is_persisted(c)]
+
+        try:
+            async with self._sessions() as session:
+                async with session.begin():
+                    await session.run_sync(_insert_events, list(new_events.values()))
+                    await session.run_sync(_update_events, modified)
+
+                    # catalogues last, their events have been inserted just before
+                    for catalogue, keys in catalogues:
+                        await self._save_catalogue(session, catalogue, keys)
+        except Exception:
+            # rolled back, the rows of the new instances are gone: they are new again
+            for instance in list(new_events.values()) + new_catalogues:
+                instance.__dict__.pop('_backend_id', None)
+            raise
+
+        for e in new_events.values():
+            e._mark_clean()
+            self.identity_map.add(e)
+        for _, e, keys in modified:
+            e._mark_clean(keys)
+            self.identity_map.add(e)
+        for catalogue, keys in catalogues:
+            catalogue._mark_clean(keys)
+
+    async def import_events(self, chunks: Iterable[List[Tuple[Dict, Dict]]], catalogue_name: str, author: str) -> int:
+        """See _Backend.import_events(), chunks are read in a thread: reading the file does not block the loop."""
+        await self._ready()
+
+        chunks = iter(chunks)
+        count = 0
+        async with self._sessions() as session:
+            async with session.begin():
+                catalogue_id = await session.run_sync(_named_catalogue, catalogue_name, author)
+
+            while (rows := await asyncio.to_thread(next, chunks, None)) is not None:
+                async with session.begin():
+                    ids, _ = await session.run_sync(_import_rows, catalogue_id, rows)
+                    count += len(ids)
+        return count
+
+    async def rebuild_fulltext_index(self):
+        """See _Backend.rebuild_fulltext_index()."""
+        await self._ready()
+
+        if self._fulltext_index:
+            async with self.engine.begin() as connection:
+                await connection.run_sync(orm.rebuild_fulltext_index)
+
+    @staticmethod
+    async def _save_catalogue(session: AsyncSession, catalogue: Catalogue, keys: Set[str]):
+        if _Backend.is_persisted(catalogue):  # only what has been modified
+            entity = await session.get(orm.Catalogue, _Backend._id(catalogue),
+                                       options=[selectinload(orm.Catalogue.attributes)])
+            if 'name' in keys:
+                entity.name = catalogue.name
+            if 'author' in keys:
+                entity.author = catalogue.author
+            if 'predicate' in keys:
+                entity.predicate = orm.encoded_predicate(catalogue.predicate)
+            keys = keys.difference(Catalogue._fixed_keys)
+        else:
+            entity = orm.Catalogue(catalogue.name, catalogue.author, orm.encoded_predicate(catalogue.predicate))
+            session.add(entity)
+            keys = catalogue.variable_attributes_as_dict().keys()
+
+        # need to use []-operator because of proxy-class in sqlalchemy - update() on __dict__ does not work
+        for k in keys:
+            if k in catalogue.__dict__:
+                entity[k] = catalogue.__dict__[k]
+            elif k in entity:
+                del entity[k]
+
+        await session.flush()
+        catalogue._backend_id = entity.id
+
+        await session.run_sync(_write_membership, entity.id,
+                               {_Backend._id(e) for e in catalogue._added_events.values()},
+                               {_Backend._id(e) for e in catalogue._removed_events.values()
+                                if _Backend.is_persisted(e)})
+
+    @staticmethod
+    def _catalogue_from_entity(c: orm.Catalogue) -> Catalogue:
+        attr = {k: v.value for k, v in c.attributes.items()}
+        catalogue = Catalogue(c.name, c.author, **attr)
+        if c.predicate is not None:
+            catalogue._set_encoded_predicate(c.predicate)
+        catalogue._backend_id = c.id
+        catalogue._mark_clean()
+        return catalogue
+
+    def _event_from_entity(self, e: orm.Event) -> Event:
+        attr = {k: v.value for k, v in e.attributes.items()}
+        event = self.identity_map.event(dict(start=e.start, end=e.end, author=e.author, uuid=e.uuid), attr)
+        event._backend_id = e.id
+        return event
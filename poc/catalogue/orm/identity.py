@@ -0,0 +1,51 @@
+from .. import Event
+
+import threading
+import weakref
+
+from typing import Dict
+
+
+class IdentityMap:
+    """Events handed out (or saved) by a backend, by uuid and weakly referenced: loading an event the application
+    still holds returns that instance, refreshed with the loaded values - except for the keys the application
+    modified and has not saved yet. Shared by the threads using a backend, access is serialized.
+    """
+
+    def __init__(self):
+        self._events = weakref.WeakValueDictionary()  # type: weakref.WeakValueDictionary[str, Event]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(self, event: Event):
+        with self._lock:
+            self._events[event.uuid] = event
+
+    def event(self, fields: Dict, attributes: Dict) -> Event:
+        """The event with the loaded fields (start, end, author and uuid) and attributes."""
+        with self._lock:
+            event = self._events.get(fields['uuid'])
+            if event is None:
+                event = Event(**fields, **attributes)
+                event._mark_clean()
+                self._events[event.uuid] = event
+            else:
+                _refresh(event, fields, attributes)
+            return event
+
+
+def _refresh(event: Event, fields: Dict, attributes: Dict):
+    # directly in __dict__, refreshing is not a modification
+    values = event.__dict__
+    dirty = event._dirty
+
+    for k in event.variable_attributes_as_dict():
+        if k not in attributes and k not in dirty:
+            del values[k]
+
+    for d in [fields, attributes]:
+        for k, v in d.items():
+            if k not in dirty:
+                values[k] = v
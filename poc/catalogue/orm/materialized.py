@@ -0,0 +1,93 @@
+from .. import Event
+from ..filter import Predicate, Comparison, All, Any, Match, Has, Not, Overlaps, SameAttribute, \
+    Search
+from ..evaluator import compile_predicate
+
+import threading
+
+from typing import Dict, List, Set, Tuple, Optional, Iterable
+
+
+def referenced_keys(pred: Predicate) -> Set[str]:
+    """Names of the fields and attributes a predicate depends on."""
+    if isinstance(pred, (Comparison, Match, Search)):
+        return {pred._lhs.value}
+    elif isinstance(pred, Has):
+        return {pred._operand.value}
+    elif isinstance(pred, Not):
+        return referenced_keys(pred._operand)
+    elif isinstance(pred, (All, Any)):
+        return set().union(*[referenced_keys(p) for p in pred._predicates])
+    elif isinstance(pred, Overlaps):
+        return {'start', 'end'}
+    elif isinstance(pred, SameAttribute):
+        return referenced_keys(pred.combined())
+    else:
+        raise NotImplementedError('Unexpected predicated instance.')
+
+
+class _Entry:
+    def __init__(self, predicate: Predicate, ids: Set[int]):
+        self.matches = compile_predicate(predicate)
+        self.keys = referenced_keys(predicate)
+        self.ids = ids
+
+
+class MaterializedResults:
+    """Ids of the events matching the predicates of registered smart catalogues.
+
+    The sets are updated incrementally with the events written by the backend: an event is re-evaluated
+    (in memory) against a predicate only if it is new or one of its written keys is referenced by the predicate.
+    Changes made by other processes are not seen. Shared by the threads using a backend, access is serialized.
+    """
+
+    def __init__(self):
+        self._entries = {}  # type: Dict[Predicate, _Entry]
+        self._lock = threading.Lock()
+
+    def __contains__(self, predicate: Predicate) -> bool:
+        with self._lock:
+            return predicate in self._entries
+
+    def add(self, predicate: Predicate, ids: Iterable[int]):
+        entry = _Entry(predicate, set(ids))
+        with self._lock:
+            self._entries[predicate] = entry
+
+    def discard(self, predicate: Predicate):
+        with self._lock:
+            self._entries.pop(predicate, None)
+
+    def predicates(self) -> List[Predicate]:
+        with self._lock:
+            return list(self._entries)
+
+    def add_ids(self, predicate: Predicate, ids: Iterable[int]):
+        """Add the ids of events found matching by the database (if predicate is still materialized)."""
+        with self._lock:
+            entry = self._entries.get(predicate)
+            if entry is not None:
+                entry.ids.update(ids)
+
+    def ids(self, predicate: Predicate) -> Optional[Set[int]]:
+        """Copy of the ids, the set of the entry may be updated by another thread meanwhile."""
+        with self._lock:
+            entry = self._entries.get(predicate)
+            return set(entry.ids) if entry else None
+
+    def update(self, written: List[Tuple[int, Event, Optional[Set[str]]]]):
+        """Update with the written events given as (id, event, written keys or None if new)-tuples."""
+        with self._lock:
+            for entry in self._entries.values():
+                for id_, event, keys in written:
+                    if keys is not None and entry.keys.isdisjoint(keys):
+                        continue
+
+                    if entry.matches(event):
+                        entry.ids.add(id_)
+                    else:
+                        entry.ids.discard(id_)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
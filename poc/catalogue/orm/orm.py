@@ -1,14 +1,19 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Unicode, UnicodeText, Boolean, Table, String, LargeBinary
-from sqlalchemy import event, literal_column
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Unicode, UnicodeText, Boolean, Table, String, \
+    LargeBinary, Index
+from sqlalchemy import event, table, column, func, select, insert, update, delete, inspect
+from sqlalchemy.sql.elements import BindParameter
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.orm.collections import attribute_mapped_collection
 from sqlalchemy.orm.interfaces import PropComparator
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
 
+from ..serialization import encode_predicate
+
 import datetime as dt
 
 import json
+import pickle
 
 Base = declarative_base()
 
@@ -82,38 +87,50 @@ class PolymorphicVerticalProperty(object):
         def __init__(self, cls):
             self.cls = cls
 
-        def _fieldname(self, py_type):
-            return self.cls.type_map[py_type][0]
+        def _fieldname(self, other):
+            if isinstance(other, BindParameter):
+                other = other.value
+            return self.cls.type_map[type(other)][0]
 
         # TODO, see whether the type-name from type_map should be used for and and_-condition
         # TODO, check whether we need to cast?!
 
+        def _column(self, other):
+            # qualified column, the typed (key, <type>_value)-indexes are used for conditions on it
+            return getattr(self.cls, self._fieldname(other))
+
         def __eq__(self, other):
-            fieldname = self._fieldname(type(other))
-            return literal_column(fieldname) == other
+            return self._column(other) == other
 
         def __ne__(self, other):
-            fieldname = self._fieldname(type(other))
-            return literal_column(fieldname) != other
+            return self._column(other) != other
 
         def __lt__(self, other):
-            fieldname = self._fieldname(type(other))
-            return literal_column(fieldname) < other
+            return self._column(other) < other
 
         def __gt__(self, other):
-            fieldname = self._fieldname(type(other))
-            return literal_column(fieldname) > other
+            return self._column(other) > other
 
         def __le__(self, other):
-            fieldname = self._fieldname(type(other))
-            return literal_column(fieldname) <= other
+            return self._column(other) <= other
 
         def __ge__(self, other):
-            fieldname = self._fieldname(type(other))
-            return literal_column(fieldname) >= other
+            return self._column(other) >= other
 
         def regexp_match(self, pattern, flags=None):
-            return literal_column('char_value').regexp_match(pattern, flags)
+            return self._column(pattern).regexp_match(pattern, flags)
+
+    @classmethod
+    def value_columns(cls, value) -> dict:
+        """Column values storing value in a row: its discriminator in "type", the value in its typed column
+        and None in all other typed columns. Used for Core-level inserts bypassing the hybrid setter."""
+        fieldname, discriminator = cls.type_map[type(value)]
+
+        columns = {f: None for f, _ in cls.type_map.values() if f is not None}
+        columns['type'] = discriminator
+        if fieldname is not None:
+            columns[fieldname] = value
+        return columns
 
     def __repr__(self):
         return f"<{self.__class__.__name__} {self.key}={self.value}>"
@@ -139,10 +156,13 @@ def on_new_class(mapper, cls_):
     cls_.type_map = info_dict
 
 
+# a pair at most once, the primary key serves the catalogues of an event, the index the events of a catalogue
 event_in_catalogue_association_table = \
     Table('event_in_catalogue', Base.metadata,
-          Column('event_id', Integer, ForeignKey('events.id')),
-          Column('catalogue_id', Integer, ForeignKey('catalogues.id')))
+          Column('event_id', Integer, ForeignKey('events.id'), primary_key=True),
+          Column('catalogue_id', Integer, ForeignKey('catalogues.id'), primary_key=True),
+          Index('ix_event_in_catalogue_catalogue_id', 'catalogue_id', 'event_id'),
+          sqlite_with_rowid=False)
 
 
 class EventAttributes(PolymorphicVerticalProperty, Base):
@@ -158,7 +178,11 @@ class EventAttributes(PolymorphicVerticalProperty, Base):
     char_value = Column(UnicodeText, info={"type": (str, "string")})
     boolean_value = Column(Boolean, info={"type": (bool, "boolean")})
     datetime_value = Column(DateTime, info={"type": (dt.datetime, "datetime")})
-    float_value = Column(DateTime, info={"type": (float, "float")})
+    float_value = Column(Float, info={"type": (float, "float")})
+
+    # covering the lookup of the events having an attribute with a given value (or range)
+    __table_args__ = tuple(Index(f'ix_events_attributes_key_{c}', 'key', c, 'event_id')
+                           for c in ['int_value', 'char_value', 'boolean_value', 'datetime_value', 'float_value'])
 
 
 class Event(ProxiedDictMixin, Base):
@@ -166,11 +190,11 @@ class Event(ProxiedDictMixin, Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
-    uuid = Column(String(36), index=True, nullable=False)
+    uuid = Column(String(36), index=True, unique=True, nullable=False)
 
-    start = Column(DateTime, nullable=False)
-    end = Column(DateTime, nullable=False)
-    author = Column(UnicodeText, nullable=False)
+    start = Column(DateTime, nullable=False, index=True)
+    end = Column(DateTime, nullable=False, index=True)
+    author = Column(UnicodeText, nullable=False, index=True)
 
     trashed = Column(Boolean, default=False)
 
@@ -204,6 +228,194 @@ class Event(ProxiedDictMixin, Base):
         return cls.attributes.any(key=key, value=value)
 
 
+# SQLite R*Tree over [start, end] of events as seconds since the epoch, kept in sync with events by triggers.
+# R*Tree coordinates are 32-bit floats rounded outwards, the index is thus only a (tight) pre-filter.
+# min/max because nothing prevents an event from ending before it starts, R*Tree rejects such boxes
+events_interval_table = table('events_interval', column('id'), column('t_start'), column('t_end'))
+
+_epoch = "((julianday({}) - 2440587.5) * 86400.0)"
+_box = "min({0}, {1}), max({0}, {1})"
+
+_interval_index_ddl = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_interval USING rtree(id, t_start, t_end)",
+
+    "CREATE TRIGGER IF NOT EXISTS events_interval_insert AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_interval SELECT new.id, {}; END".format(
+        _box.format(_epoch.format('new.start'), _epoch.format('new."end"'))),
+
+    'CREATE TRIGGER IF NOT EXISTS events_interval_update AFTER UPDATE OF start, "end" ON events BEGIN '
+    "UPDATE events_interval SET (t_start, t_end) = (SELECT {}) WHERE id = new.id; END".format(
+        _box.format(_epoch.format('new.start'), _epoch.format('new."end"'))),
+
+    "CREATE TRIGGER IF NOT EXISTS events_interval_delete AFTER DELETE ON events BEGIN "
+    "DELETE FROM events_interval WHERE id = old.id; END",
+
+    # events of databases created before the index existed
+    "INSERT INTO events_interval SELECT id, {} FROM events WHERE id NOT IN (SELECT id FROM events_interval)".format(
+        _box.format(_epoch.format('start'), _epoch.format('"end"'))),
+]
+
+
+def epoch(t):
+    """SQL-expression of the coordinate of t in events_interval."""
+    return (func.julianday(t) - 2440587.5) * 86400.0
+
+
+def create_missing_indexes(connection):
+    """create_all() only creates missing tables, indexes added later to existing tables are created here."""
+    for t in Base.metadata.sorted_tables:
+        for index in t.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def add_membership_primary_key(connection):
+    """event_in_catalogue of databases created before it had a primary key is rebuilt with it (and without
+    duplicate pairs). Called before create_missing_indexes(), the rebuilt table is created with its index."""
+    membership = event_in_catalogue_association_table
+    if inspect(connection).get_pk_constraint(membership.name)['constrained_columns']:
+        return
+
+    old = table('event_in_catalogue_old', column('event_id'), column('catalogue_id'))
+    connection.exec_driver_sql('ALTER TABLE event_in_catalogue RENAME TO event_in_catalogue_old')
+    membership.create(connection)
+    connection.execute(insert(membership).from_select(
+        ['event_id', 'catalogue_id'],
+        select(old.c.event_id, old.c.catalogue_id)
+        .where(old.c.event_id.is_not(None), old.c.catalogue_id.is_not(None)).distinct()))
+    connection.exec_driver_sql('DROP TABLE event_in_catalogue_old')
+
+
+def make_event_uuids_unique(connection, batch_size: int = 10000):
+    """events.uuid of databases created before it was unique: of the events sharing a uuid the first one (lowest id)
+    is kept and added to the catalogues of the others, which are deleted with their attributes. The index of uuid is
+    then re-created unique by create_missing_indexes()."""
+    indexes = {index['name']: index for index in inspect(connection).get_indexes('events')}
+    if indexes.get('ix_events_uuid', {}).get('unique'):
+        return
+
+    events = Event.__table__
+    membership = event_in_catalogue_association_table
+    attributes = EventAttributes.__table__
+
+    first = select(events.c.uuid, func.min(events.c.id).label('id')) \
+        .group_by(events.c.uuid).having(func.count() > 1).subquery()
+    kept = dict(connection.execute(select(events.c.id, first.c.id).join(first, events.c.uuid == first.c.uuid)
+                                   .where(events.c.id != first.c.id)).all())  # {duplicate: kept}
+
+    duplicates = sorted(kept)
+    for i in range(0, len(duplicates), batch_size):
+        batch = duplicates[i:i + batch_size]
+        pairs = {(kept[event_id], catalogue_id) for event_id, catalogue_id in connection.execute(
+            select(membership.c.event_id, membership.c.catalogue_id).where(membership.c.event_id.in_(batch)))}
+        present = set(connection.execute(
+            select(membership.c.event_id, membership.c.catalogue_id)
+            .where(membership.c.event_id.in_({event_id for event_id, _ in pairs}))).all())
+        rows = [dict(event_id=event_id, catalogue_id=catalogue_id) for event_id, catalogue_id in pairs - present]
+        if rows:
+            connection.execute(insert(membership), rows)
+
+        connection.execute(delete(membership).where(membership.c.event_id.in_(batch)))
+        connection.execute(delete(attributes).where(attributes.c.event_id.in_(batch)))
+        connection.execute(delete(events).where(events.c.id.in_(batch)))
+
+    if 'ix_events_uuid' in indexes:
+        connection.exec_driver_sql('DROP INDEX ix_events_uuid')
+
+
+def create_interval_index(connection) -> bool:
+    """Creates the events_interval index if the database supports it, returns whether it is available."""
+    if connection.dialect.name != 'sqlite':
+        return False
+
+    for ddl in _interval_index_ddl:
+        connection.exec_driver_sql(ddl)
+    return True
+
+
+# SQLite FTS5 indexes of the string values of attributes and of the names of catalogues, see filter.Search: external
+# content tables (the text is only stored in the indexed table) kept in sync by triggers. Case is folded, diacritics
+# are kept and letters and digits make tokens - as the words of Search. The unindexed columns (read from the indexed
+# table) answer a search without joining it. Attribute rows are referenced by their implicit rowid which VACUUM may
+# renumber, rebuild_fulltext_index() re-indexes them.
+# (index, indexed table, its rowid, indexed column, unindexed columns, condition of indexed rows on "{}" (old, new or
+# the table))
+_fulltext_indexes = [
+    ('events_attributes_fts', 'events_attributes', 'rowid', 'char_value', ['event_id', 'key'], "{}.type = 'string'"),
+    ('catalogues_attributes_fts', 'catalogues_attributes', 'rowid', 'char_value', ['event_id', 'key'],
+     "{}.type = 'string'"),
+    ('catalogues_name_fts', 'catalogues', 'id', 'name', [], "1"),
+]
+
+
+def _fulltext_index_ddl(index: str, content: str, rowid: str, text: str, unindexed: list, indexed: str) -> list:
+    columns = ', '.join(unindexed + [text])
+
+    def values(row):
+        return ', '.join(f'{row}.{c}' for c in [rowid] + unindexed + [text])
+
+    # rows are removed from an external content index by a 'delete' of the values they have been indexed with
+    insert = f"INSERT INTO {index}(rowid, {columns}) SELECT {values('new')} WHERE {indexed.format('new')};"
+    delete = f"INSERT INTO {index}({index}, rowid, {columns}) SELECT 'delete', {values('old')} " \
+             f"WHERE {indexed.format('old')};"
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5({}, content='{}', content_rowid='{}', "
+        "tokenize='unicode61 remove_diacritics 0')".format(
+            index, ', '.join([f'{c} UNINDEXED' for c in unindexed] + [text]), content, rowid),
+        f"CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {content} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {content} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE ON {content} BEGIN {delete} {insert} END",
+    ]
+
+
+def _fulltext_index_rebuild(index: str, content: str, rowid: str, text: str, unindexed: list, indexed: str) -> list:
+    columns = unindexed + [text]
+    return [
+        f"INSERT INTO {index}({index}) VALUES('delete-all')",
+        f"INSERT INTO {index}(rowid, {', '.join(columns)}) "
+        f"SELECT {', '.join([rowid] + columns)} FROM {content} WHERE {indexed.format(content)}",
+    ]
+
+
+def fulltext_index(indexed):
+    """Table of the full-text index of the column indexed, None if it has none."""
+    for index, content, _, text, unindexed, _ in _fulltext_indexes:
+        if indexed.table.name == content and indexed.name == text:
+            return table(index, *[column(c) for c in ['rowid'] + unindexed + [text]])
+    return None
+
+
+def has_fulltext_index(connection) -> bool:
+    """Whether the full-text indexes have been created in the database."""
+    if connection.dialect.name != 'sqlite':
+        return False
+    names = [spec[0] for spec in _fulltext_indexes]
+    existing = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE name IN ({})".format(
+        ', '.join('?' * len(names))), tuple(names)).scalars().all()
+    return len(existing) == len(names)
+
+
+def create_fulltext_index(connection) -> bool:
+    """Creates the full-text indexes if the database supports them (indexing the existing rows when an index is
+    new), returns whether they are available. Once created their triggers keep them up to date on every write,
+    making inserts slower."""
+    if connection.dialect.name != 'sqlite' or \
+            connection.exec_driver_sql("SELECT 1 FROM pragma_module_list WHERE name = 'fts5'").first() is None:
+        return False
+
+    for spec in _fulltext_indexes:
+        new = connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = ?", (spec[0],)).first() is None
+        for ddl in _fulltext_index_ddl(*spec) + (_fulltext_index_rebuild(*spec) if new else []):
+            connection.exec_driver_sql(ddl)
+    return True
+
+
+def rebuild_fulltext_index(connection):
+    """Re-indexes all rows, needed after a VACUUM."""
+    for spec in _fulltext_indexes:
+        for ddl in _fulltext_index_rebuild(*spec):
+            connection.exec_driver_sql(ddl)
+
+
 class CatalogueAttributes(PolymorphicVerticalProperty, Base):
     """Meta-data (key-value-store) for a catalogue."""
 
@@ -217,7 +429,10 @@ class CatalogueAttributes(PolymorphicVerticalProperty, Base):
     char_value = Column(UnicodeText, info={"type": (str, "string")})
     boolean_value = Column(Boolean, info={"type": (bool, "boolean")})
     datetime_value = Column(DateTime, info={"type": (dt.datetime, "datetime")})
-    float_value = Column(DateTime, info={"type": (float, "float")})
+    float_value = Column(Float, info={"type": (float, "float")})
+
+    __table_args__ = tuple(Index(f'ix_catalogues_attributes_key_{c}', 'key', c, 'event_id')
+                           for c in ['int_value', 'char_value', 'boolean_value', 'datetime_value', 'float_value'])
 
 
 class Catalogue(ProxiedDictMixin, Base):
@@ -231,8 +446,9 @@ class Catalogue(ProxiedDictMixin, Base):
 
     trashed = Column(Boolean, default=False)
 
+    # deleting a key deletes its row
     attributes = relationship(
-        "CatalogueAttributes", collection_class=attribute_mapped_collection("key")
+        "CatalogueAttributes", collection_class=attribute_mapped_collection("key"), cascade="all, delete-orphan"
     )
 
     events = relationship("Event",
@@ -258,3 +474,20 @@ class Catalogue(ProxiedDictMixin, Base):
     @classmethod
     def with_characteristic(cls, key, value):
         return cls.attributes.any(key=key, value=value)
+
+
+def encoded_predicate(predicate) -> bytes:
+    """Value of the predicate column (None for catalogues without predicate)."""
+    return encode_predicate(predicate) if predicate is not None else None
+
+
+def migrate_pickled_predicates(connection):
+    """Re-encodes the predicates which have been stored pickled by earlier versions. A pickle (protocol >= 2)
+    starts with the PROTO opcode, the encoded predicates with "[" - only pickled ones are read."""
+    catalogues = Catalogue.__table__
+    rows = connection.execute(select(catalogues.c.id, catalogues.c.predicate)
+                              .where(func.substr(catalogues.c.predicate, 1, 1) == b'\x80')).all()
+
+    for id_, data in rows:
+        connection.execute(update(catalogues).where(catalogues.c.id == id_)
+                           .values(predicate=encoded_predicate(pickle.loads(data))))
@@ -0,0 +1,130 @@
+import re
+
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+_quantifiers = '*?{'  # make the preceding character optional ({m,n} conservatively too)
+_breaks = '.$+)'  # end a run of literal characters
+_class_escapes = 'dDwWsSbBAZ'  # escapes matching no (or not one known) character
+
+
+@lru_cache(maxsize=256)
+def _compiled(pattern: str):
+    return re.compile(pattern)
+
+
+def regexp(pattern: str, value) -> Optional[bool]:
+    """The REGEXP-function of SQLite (not built-in), patterns are compiled once for their latest uses."""
+    if value is None:
+        return None
+    return _compiled(pattern).search(value) is not None
+
+
+def _skip_group(pattern: str, i: int) -> int:
+    """Index after the group opened at i."""
+    depth = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 1
+        elif c == '[':
+            i = _skip_class(pattern, i) - 1
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _skip_class(pattern: str, i: int) -> int:
+    """Index after the character class opened at i."""
+    i += 1
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    if i < len(pattern) and pattern[i] == ']':  # first ] is a literal
+        i += 1
+    while i < len(pattern) and pattern[i] != ']':
+        if pattern[i] == '\\':
+            i += 1
+        i += 1
+    return i + 1
+
+
+def required_literals(pattern: str) -> Tuple[Optional[str], List[str]]:
+    """Literal prefix (if anchored with ^) and other literal substrings every match of pattern contains.
+
+    Conservative: (None, []) for patterns with alternatives or flags, groups and classes only end a run of
+    literals. Used as prefilters of Match in SQL, ahead of the regex itself.
+    """
+    if '|' in pattern or '(?' in pattern.replace('(?:', '').replace('(?P', '').replace('(?=', '') \
+            .replace('(?!', '').replace('(?<', ''):
+        return None, []
+
+    anchored = pattern.startswith('^')
+    i = 1 if anchored else 0
+
+    runs = []
+    run = ''
+    prefix_run = anchored
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            if i + 1 == len(pattern):
+                return None, []
+            e = pattern[i + 1]
+            if e.isalnum():
+                if e not in _class_escapes:  # \x41, \n, back-references, ...: not analysed
+                    return None, []
+                runs += [(run, prefix_run)]
+                run, prefix_run = '', False
+            else:
+                run += e
+            i += 2
+            continue
+
+        if c in _quantifiers:
+            run = run[:-1]
+            runs += [(run, prefix_run)]
+            run, prefix_run = '', False
+            if c == '{':
+                i = pattern.find('}', i) + 1 if '}' in pattern[i:] else len(pattern)
+                continue
+        elif c in _breaks:
+            runs += [(run, prefix_run)]
+            run, prefix_run = '', False
+        elif c == '[':
+            runs += [(run, prefix_run)]
+            run, prefix_run = '', False
+            i = _skip_class(pattern, i)
+            continue
+        elif c == '(':
+            runs += [(run, prefix_run)]
+            run, prefix_run = '', False
+            i = _skip_group(pattern, i)
+            continue
+        elif c == '^':
+            return None, []
+        else:
+            run += c
+        i += 1
+    runs += [(run, prefix_run)]
+
+    prefix = next((r for r, is_prefix in runs if is_prefix and r), None)
+    substrings = [r for r, is_prefix in runs if not is_prefix and r]
+    return prefix, substrings
+
+
+def prefix_successor(prefix: str) -> Optional[str]:
+    """Smallest string greater than all strings starting with prefix (in code point order), None if there is
+    none."""
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if code == 0xD800:  # not encodable surrogates
+            code = 0xE000
+        if code <= 0x10FFFF:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
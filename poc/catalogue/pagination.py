@@ -0,0 +1,35 @@
+from .serialization import _encode_value, _decode_value
+
+import base64
+import json
+
+from typing import List, Optional, Sequence, Tuple
+
+
+class Page(list):
+    """One page of a paginated listing, cursor is passed as after to fetch the next one (None on the last page)."""
+
+    def __init__(self, items: List, cursor: Optional[str]):
+        super().__init__(items)
+        self.cursor = cursor
+
+
+def encode_cursor(order_by: Sequence[str], values: Sequence) -> str:
+    """Opaque cursor of the position after the row with the given values of the order_by-columns."""
+    data = json.dumps([list(order_by), [_encode_value(v) for v in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str, order_by: Sequence[str]) -> Tuple:
+    try:
+        cursor_order_by, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values = tuple(_decode_value(v) for v in values)
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid cursor.')
+
+    if cursor_order_by != list(order_by):
+        raise ValueError('Cursor does not match order_by.')
+    if len(values) != len(order_by):
+        raise ValueError('Invalid cursor.')
+
+    return values
@@ -0,0 +1,112 @@
+from .filter import Predicate, Comparison, Field, Attribute, All, Any, Match, Has, Not, Overlaps, SameAttribute, \
+    AnyEvent, Search
+
+import json
+import datetime as dt
+
+from typing import Union
+
+# Predicates are stored as JSON: [version, node], a node is a list [class-name, operands...] with
+#   Comparison: op, lhs, rhs     Match: lhs, regex     Search: lhs, words     Not: node     Has: attribute
+#   All, Any: nodes...           Overlaps: start, end  SameAttribute: "All" or "Any", Comparison-nodes...
+#   AnyEvent: node
+# lhs and attributes are ["Field", name] or ["Attribute", name], datetimes {"datetime": isoformat}, other literals
+# (str, int, float, bool) are JSON values. Incompatible changes of this layout need a new version.
+version = 1
+
+_combinators = {'All': All, 'Any': Any}
+
+
+def _encode_value(value):
+    if type(value) == dt.datetime:
+        return {'datetime': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if type(value) == dict:
+        return dt.datetime.fromisoformat(value['datetime'])
+    return value
+
+
+def _encode_operand(operand: Union[Field, Attribute]) -> list:
+    return [type(operand).__name__, operand.value]
+
+
+def _decode_operand(operand: list) -> Union[Field, Attribute]:
+    kind, name = operand
+    if kind == 'Field':
+        return Field(name)
+    elif kind == 'Attribute':
+        return Attribute(name)
+    raise ValueError('Invalid operand in encoded predicate.')
+
+
+def _encode(pred: Predicate) -> list:
+    if isinstance(pred, Comparison):
+        return ['Comparison', pred._op, _encode_operand(pred._lhs), _encode_value(pred._rhs)]
+    elif isinstance(pred, Match):
+        return ['Match', _encode_operand(pred._lhs), pred._rhs]
+    elif isinstance(pred, Search):
+        return ['Search', _encode_operand(pred._lhs), pred._rhs]
+    elif isinstance(pred, Not):
+        return ['Not', _encode(pred._operand)]
+    elif isinstance(pred, Has):
+        return ['Has', _encode_operand(pred._operand)]
+    elif isinstance(pred, (All, Any)):
+        return [type(pred).__name__] + [_encode(p) for p in pred._predicates]
+    elif isinstance(pred, Overlaps):
+        return ['Overlaps', _encode_value(pred._start), _encode_value(pred._end)]
+    elif isinstance(pred, SameAttribute):
+        return ['SameAttribute', pred._combinator.__name__] + [_encode(c) for c in pred._comparisons]
+    elif isinstance(pred, AnyEvent):
+        return ['AnyEvent', _encode(pred._operand)]
+    else:
+        raise NotImplementedError('Unexpected predicated instance.')
+
+
+def _decode(node: list) -> Predicate:
+    kind, *operands = node
+    if kind == 'Comparison':
+        op, lhs, rhs = operands
+        return Comparison(op, _decode_operand(lhs), _decode_value(rhs))
+    elif kind == 'Match':
+        lhs, regex = operands
+        return Match(_decode_operand(lhs), regex)
+    elif kind == 'Search':
+        lhs, words = operands
+        return Search(_decode_operand(lhs), words)
+    elif kind == 'Not':
+        return Not(_decode(*operands))
+    elif kind == 'Has':
+        return Has(_decode_operand(*operands))
+    elif kind in _combinators:
+        return _combinators[kind](*[_decode(p) for p in operands])
+    elif kind == 'Overlaps':
+        start, end = operands
+        return Overlaps(_decode_value(start), _decode_value(end))
+    elif kind == 'SameAttribute':
+        combinator, *comparisons = operands
+        return SameAttribute(_combinators[combinator], *[_decode(c) for c in comparisons])
+    elif kind == 'AnyEvent':
+        return AnyEvent(_decode(*operands))
+    raise ValueError(f'Invalid node {kind} in encoded predicate.')
+
+
+def encode_predicate(pred: Predicate) -> bytes:
+    return json.dumps([version, _encode(pred)], separators=(',', ':')).encode()
+
+
+def decode_predicate(data: bytes) -> Predicate:
+    try:
+        data_version, node = json.loads(data)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid encoded predicate.')
+
+    if data_version != version:
+        raise ValueError(f'Unsupported version {data_version} of encoded predicate.')
+
+    try:
+        return _decode(node)
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid encoded predicate.')
@@ -0,0 +1,74 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend
+from catalogue.filter import Comparison, Field, Attribute, All, Any, Not, Has, Match
+
+from bench_common import generate_events, missions, random_datetime
+
+import random
+import time
+import datetime as dt
+
+
+def generate_predicate(depth: int):
+    r = random.random()
+    if depth > 0 and r < 0.5:
+        return random.choice([All, Any])(*[generate_predicate(depth - 1) for _ in range(random.randint(2, 3))])
+    if depth > 0 and r < 0.6:
+        return Not(generate_predicate(depth - 1))
+
+    return random.choice([
+        lambda: Comparison(random.choice(['<', '>=']), Field('start'), random_datetime()),
+        lambda: Comparison(random.choice(['==', '!=', '<', '>=']), Attribute('priority'), random.randint(0, 999)),
+        lambda: Comparison(random.choice(['==', '!=']), Attribute('mission'), random.choice(missions)),
+        lambda: Comparison(random.choice(['<', '>=']), Attribute('created'), random_datetime()),
+        lambda: Comparison('<', Attribute('missing'), random_datetime()),  # key of no event, of a typed literal
+        lambda: Comparison('==', Attribute('missing'), 1),
+        lambda: Has(Attribute(random.choice(['created', 'missing']))),
+        lambda: Match(Attribute('mission'), random.choice(['^mms', 'r$'])),
+    ])()
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    attributes = dict(authors=['Patrick', 'Alexis'],
+                      mission=lambda: random.choice(missions),
+                      priority=lambda: random.randint(0, 999),
+                      created=lambda: random_datetime() if random.random() < 0.5 else None)
+
+    # differential check: the masks select the events the queries return
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(5000, **attributes))
+    backend.commit()
+
+    columns = backend.get_columns()
+    for _ in range(100):
+        pred = generate_predicate(3)
+        expected = {e.uuid for e in backend.get_events(Catalogue('check', 'Patrick', predicate=pred))}
+        assert set(columns.uuids(pred)) == expected, pred
+
+    count = 200000
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, **attributes))
+    backend.commit()
+
+    t0 = time.perf_counter()
+    columns = backend.get_columns()
+    t_columns = time.perf_counter() - t0
+
+    pred = All(Comparison('>=', Attribute('priority'), 500),
+               Comparison('==', Attribute('mission'), 'mms1'),
+               Comparison('<', Field('start'), dt.datetime(2030, 1, 1)))
+
+    t0 = time.perf_counter()
+    n_mask = int(columns.mask(pred).sum())
+    t_mask = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    n_query = len(backend.get_events(Catalogue('bench', 'Patrick', predicate=pred)))
+    t_query = time.perf_counter() - t0
+
+    assert n_mask == n_query
+    print(f'{count} events, snapshot taken in {t_columns:.2f}s, {n_mask} matching')
+    print(f'mask       {t_mask * 1e3:>8.1f}ms')
+    print(f'get_events {t_query * 1e3:>8.1f}ms')
@@ -0,0 +1,64 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend
+from catalogue.filter import Comparison, Field
+
+from bench_common import generate_events
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import random
+import tempfile
+import threading
+import time
+
+
+def reader(backend, catalogue, stop):
+    reads = 0
+    while not stop.is_set():
+        backend.get_events(catalogue)
+        reads += 1
+    return reads
+
+
+def writer(backend, stop):
+    writes = 0
+    while not stop.is_set():
+        backend.insert_events(generate_events(10, ['Writer'], priority=lambda: random.randint(0, 99)))
+        backend.commit()
+        writes += 1
+    return writes
+
+
+if __name__ == "__main__":
+    duration = 3
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = _Backend('sqlite:///' + str(Path(directory) / 'bench.sqlite'))
+        backend.insert_events(generate_events(200000, priority=lambda: random.randint(0, 99)))
+        backend.commit()
+
+        # author is indexed: a lookup in the index by SQLite, which releases the GIL meanwhile, returning few events -
+        # the readers measure the concurrency of the sessions, not the cost of a query
+        catalogue = Catalogue('rare', 'Patrick', predicate=Comparison('==', Field('author'), 'Alexis'))
+
+        written = 0
+        print(f"{'readers':>7} | {'reads/s':>8} | {'writes/s':>8} (one writer thread, 10 events per commit)")
+
+        for threads in [1, 2, 4, 8]:
+            stop = threading.Event()
+            with ThreadPoolExecutor(threads + 1) as pool:
+                reads = [pool.submit(reader, backend, catalogue, stop) for _ in range(threads)]
+                writes = pool.submit(writer, backend, stop)
+                time.sleep(duration)
+                stop.set()
+
+                total_reads = sum(r.result() for r in reads)
+                total_writes = writes.result()
+                written += total_writes
+
+            print(f'{threads:>7} | {total_reads / duration:>8.1f} | {total_writes / duration:>8.1f}')
+
+        # nothing lost or duplicated by the concurrent sessions
+        assert len(backend.get_events(Catalogue('writer', 'Patrick',
+                                                predicate=Comparison('==', Field('author'), 'Writer')))) == 10 * written
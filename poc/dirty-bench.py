@@ -0,0 +1,41 @@
+from catalogue.orm import _Backend
+
+from bench_common import generate_events, timed, missions
+
+import random
+
+
+def save(backend, events):
+    for e in events:
+        backend.save_event(e)
+    backend.commit()
+
+
+if __name__ == "__main__":
+    count = 50000
+    touched = 10
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, mission=lambda: random.choice(missions),
+                                          priority=lambda: random.randint(0, 9)))
+    backend.commit()
+
+    events = backend.get_events()
+
+    for e in random.sample(events, touched):
+        e.priority = 10
+        del e.mission
+    _, t_dirty = timed(lambda: save(backend, events))
+
+    # what saving used to do: every field and attribute of every event written again
+    for e in events:
+        e._dirty.update(['start', 'end', 'author', 'uuid'], e.variable_attributes_as_dict())
+    _, t_all = timed(lambda: save(backend, events))
+
+    counts = dict(backend.attribute_value_counts(None, 'priority'))
+    assert counts[10] == touched
+    assert backend.count_events() - sum(n for _, n in backend.attribute_value_counts(None, 'mission')) == touched
+
+    print(f're-saving {count} events after modifying {touched} of them')
+    print(f'modified keys only   {t_dirty * 1e3:>9.1f}ms')
+    print(f'everything           {t_all * 1e3:>9.1f}ms')
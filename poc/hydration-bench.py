@@ -0,0 +1,59 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend, orm
+
+from bench_common import generate_events
+
+from sqlalchemy import event as sa_event
+
+import random
+import time
+import datetime as dt
+
+attr_source = {'priority': [1, 2, 3, 4, 5, 6, 7, 8],
+               'mission': ['mms1', 'mms2', 'cluster1', 'cluster2'],
+               'season': ['spring', 'summer', 'autumn', 'winter']}
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        sa_event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def measure(backend, counter, fn):
+    backend.session.expunge_all()  # start every run with an empty identity map
+    counter.count = 0
+    t0 = time.perf_counter()
+    n = len(fn())
+    return n, counter.count, time.perf_counter() - t0
+
+
+def lazy_get_events(backend):
+    # hydration as it was done before: one lazy-load per event
+    return [{k: v.value for k, v in e.attributes.items()} for e in backend.session.query(orm.Event)]
+
+
+if __name__ == "__main__":
+    print(f"{'events':>8} | {'lazy queries':>12} {'lazy time':>10} | "
+          f"{'eager queries':>13} {'eager time':>10} {'per event':>10}")
+
+    for count in [100, 1000, 10000, 50000]:
+        backend = _Backend('sqlite://')
+        counter = QueryCounter(backend.engine)
+
+        for e in generate_events(count, duration=lambda: dt.timedelta(seconds=random.randint(0, 2 ** 31)),
+                                 **{k: (lambda v=v: random.choice(v)) for k, v in attr_source.items()}):
+            backend.save_event(e)
+        for i in range(10):
+            backend.save_catalogue(Catalogue(f'Catalogue {i}', 'Patrick', notes='benchmark', version=i))
+        backend.commit()
+
+        _, lazy_q, lazy_t = measure(backend, counter, lambda: lazy_get_events(backend))
+        n, eager_q, eager_t = measure(backend, counter, backend.get_events)
+        print(f'{n:>8} | {lazy_q:>12} {lazy_t:>9.3f}s | {eager_q:>13} {eager_t:>9.3f}s {eager_t / n * 1e6:>8.1f}us')
+
+        n, q, t = measure(backend, counter, backend.get_catalogues)
+        print(f'{"":>8} | {n} catalogues hydrated with {q} queries in {t:.3f}s')
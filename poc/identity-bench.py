@@ -0,0 +1,45 @@
+from catalogue.orm import _Backend
+from catalogue.orm.identity import IdentityMap
+
+from bench_common import generate_events, timed, missions
+
+import gc
+import random
+import tracemalloc
+
+
+def retained(f):
+    """Result of f and the memory it retains."""
+    gc.collect()
+    tracemalloc.start()
+    result = f()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+if __name__ == "__main__":
+    count = 50000
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, mission=lambda: random.choice(missions),
+                                          priority=lambda: random.randint(0, 9)))
+    backend.commit()
+
+    def get_events():
+        backend.session.expunge_all()  # entities of a previous call would not be counted
+        return backend.get_events()
+
+    # the application holds the events of a first query, and queries again (e.g. a view is refreshed)
+    held, held_size = retained(get_events)
+    again, again_size = retained(get_events)
+    assert all(a is b for a, b in zip(sorted(held, key=id), sorted(again, key=id)))
+
+    _, t_again = timed(get_events)
+    backend.identity_map = IdentityMap()  # as if nothing was held: all events built again
+    _, t_first = timed(get_events)
+
+    print(f'{count} events with 2 attributes')
+    print(f'first get_events()           {held_size / count:>7.0f} bytes/event {t_first * 1e3:>8.1f}ms')
+    print(f'get_events() of held events  {again_size / count:>7.0f} bytes/event {t_again * 1e3:>8.1f}ms')
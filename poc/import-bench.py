@@ -0,0 +1,44 @@
+import subprocess
+import statistics
+import sys
+import tempfile
+
+# each statement runs in a fresh interpreter with an empty home directory, reporting its own duration in ms
+template = """
+import time
+t0 = time.perf_counter()
+{}
+import datetime as dt
+from catalogue import Event
+from catalogue.filter import All, Comparison, Attribute, Field
+e = Event(dt.datetime(2000, 1, 1), dt.datetime(2000, 1, 2), 'Patrick', mission='mms1')
+p = All(Comparison('==', Attribute('mission'), 'mms1'), Comparison('>', Field('start'), dt.datetime(1999, 1, 1)))
+t1 = time.perf_counter()
+import sys, os
+print((t1 - t0) * 1e3, 'sqlalchemy' in sys.modules,
+      os.path.exists(os.path.expanduser('~/.space-event-catalogue.sqlite')))
+"""
+
+cases = {
+    'import catalogue': 'import catalogue',
+    'import catalogue.api': 'import catalogue.api',
+    'import catalogue.aio': 'import catalogue.aio',
+    'first api-call': 'import catalogue.api\ncatalogue.api.get_events()',
+}
+
+
+def measure(statement: str, repeat: int = 7):
+    timings = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as home:
+            output = subprocess.run([sys.executable, '-c', template.format(statement)], env={'HOME': home},
+                                    capture_output=True, text=True, check=True).stdout.split()
+        timings += [float(output[0])]
+    return statistics.median(timings), output[1] == 'True', output[2] == 'True'
+
+
+if __name__ == "__main__":
+    print(f"{'':>22} | {'median':>9} | {'sqlalchemy imported':>19} | {'database created':>16}")
+    for name, statement in cases.items():
+        t, sqlalchemy, database = measure(statement)
+        print(f'{name:>22} | {t:>7.1f}ms | {str(sqlalchemy):>19} | {str(database):>16}')
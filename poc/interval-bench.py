@@ -0,0 +1,36 @@
+from catalogue.orm import _Backend, PredicateVisitor, orm
+from catalogue.filter import Comparison, Field, All, Overlaps
+
+from bench_common import generate_events
+
+import random
+import time
+import datetime as dt
+
+
+def timed_count(backend, predicate, repeat=20):
+    f = PredicateVisitor(orm.Event, backend._interval_index).visit_predicate(predicate)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        n = backend.session.query(orm.Event.id).filter(f).count()
+    return n, (time.perf_counter() - t0) / repeat
+
+
+if __name__ == "__main__":
+    print(f"{'events':>8} | {'matches':>7} | {'comparisons':>11} | {'overlaps':>9}")
+
+    for count in [10000, 100000, 500000]:
+        backend = _Backend('sqlite://')
+        backend.insert_events(generate_events(
+            count, duration=lambda: dt.timedelta(seconds=random.randint(0, 3 * 24 * 3600))))
+        backend.commit()
+
+        t0 = dt.datetime(2000, 1, 1)
+        t1 = t0 + dt.timedelta(days=30)
+
+        n_cmp, t_cmp = timed_count(backend, All(Comparison('<=', Field('start'), t1),
+                                                Comparison('>=', Field('end'), t0)))
+        n_ovl, t_ovl = timed_count(backend, Overlaps(t0, t1))
+        assert n_cmp == n_ovl
+
+        print(f'{count:>8} | {n_ovl:>7} | {t_cmp * 1e3:>9.2f}ms | {t_ovl * 1e3:>7.2f}ms')
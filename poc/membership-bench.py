@@ -0,0 +1,43 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend, orm
+
+from bench_common import generate_events, timed
+
+import random
+
+import catalogue.api as api
+
+
+if __name__ == "__main__":
+    count = 100000
+
+    backend = _Backend('sqlite://')
+    events = generate_events(2 * count, priority=lambda: random.randint(0, 9))
+    backend.insert_events(events)
+    backend.commit()
+
+    catalogue = Catalogue('large', 'Patrick')
+    api.save(catalogue, backend)
+
+    membership = orm.event_in_catalogue_association_table
+
+    def rows():
+        return backend.session.query(membership).filter(membership.c.catalogue_id == backend._id(catalogue)).count()
+
+    def change(add, remove):
+        catalogue.add_events(add)
+        catalogue.remove_events(remove)
+        api.save(catalogue, backend)
+
+    _, t_add = timed(lambda: change(events[:count], []))
+    assert rows() == count
+
+    _, t_mixed = timed(lambda: change(events[count // 2:count + count // 2], events[:count // 2]))
+    assert rows() == count
+
+    _, t_remove = timed(lambda: change([], events))
+    assert rows() == 0
+
+    print(f'adding {count} events       {t_add * 1e3:>9.1f}ms')
+    print(f'adding and removing {count // 2} {t_mixed * 1e3:>9.1f}ms')
+    print(f'removing {count} events     {t_remove * 1e3:>9.1f}ms')
@@ -0,0 +1,75 @@
+from catalogue.orm import _Backend, PredicateVisitor, orm
+from catalogue.filter import Comparison, Field, Attribute, All, Any, Not, Has, Match
+from catalogue.optimizer import optimize
+
+from bench_common import generate_events, random_datetime
+
+import random
+import time
+import datetime as dt
+
+attr_source = {'priority': [1, 2, 3, 4, 5, 6, 7, 8],
+               'mission': ['mms1', 'mms2', 'cluster1', 'cluster2'],
+               'season': ['spring', 'summer', 'autumn', 'winter']}
+
+
+def generate_predicate(depth: int):
+    """UI-like predicate: nested All/Any/Not with several comparisons of the same attributes"""
+    r = random.random()
+    if depth > 0 and r < 0.6:
+        return random.choice([All, Any])(*[generate_predicate(depth - 1) for _ in range(random.randint(2, 3))])
+    if depth > 0 and r < 0.7:
+        return Not(Not(generate_predicate(depth - 1)))
+
+    r = random.random()
+    if r < 0.5:
+        key = random.choice(['priority', 'mission'])
+        return Comparison(random.choice(['==', '!=', '<', '>=']), Attribute(key), random.choice(attr_source[key]))
+    elif r < 0.7:
+        return Comparison(random.choice(['<', '>=']), Field('start'), random_datetime())
+    elif r < 0.8:
+        return Has(Attribute(random.choice(list(attr_source))))
+    else:
+        return Match(Attribute('season'), random.choice(['^s', 'er$']))
+
+
+def run(backend, f):
+    t0 = time.perf_counter()
+    n = backend.session.query(orm.Event.id).filter(f).count()
+    return n, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    random.seed(0)
+
+    backend = _Backend('sqlite://')
+    # long intervals, each attribute in 80% of the events
+    backend.insert_events(generate_events(
+        20000, duration=lambda: dt.timedelta(seconds=random.randint(0, 2 ** 31)),
+        **{k: (lambda v=v: random.choice(v) if random.random() < 0.8 else None) for k, v in attr_source.items()}))
+    backend.commit()
+
+    print(f"{'depth':>5} | {'nodes':>5} -> {'opt.':>5} | {'translate':>9} {'query':>9} | "
+          f"{'optimize+transl.':>16} {'query':>9}")
+
+    for depth in [2, 4, 6, 8]:
+        for _ in range(3):
+            pred = generate_predicate(depth)
+            size = len(repr(pred).split('('))
+
+            t0 = time.perf_counter()
+            plain = PredicateVisitor(orm.Event, backend._interval_index).visit_predicate(pred)
+            t_plain = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            optimized_pred = optimize(pred)
+            optimized = PredicateVisitor(orm.Event, backend._interval_index).visit_predicate(optimized_pred)
+            t_opt = time.perf_counter() - t0
+            opt_size = len(repr(optimized_pred).split('('))
+
+            n_plain, q_plain = run(backend, plain)
+            n_opt, q_opt = run(backend, optimized)
+            assert n_plain == n_opt
+
+            print(f'{depth:>5} | {size:>5} -> {opt_size:>5} | {t_plain * 1e3:>7.2f}ms {q_plain * 1e3:>7.1f}ms | '
+                  f'{t_opt * 1e3:>14.2f}ms {q_opt * 1e3:>7.1f}ms')
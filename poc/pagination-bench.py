@@ -0,0 +1,38 @@
+from catalogue.orm import _Backend, orm
+from catalogue.pagination import encode_cursor
+
+from bench_common import generate_events, timed
+
+from sqlalchemy.orm import selectinload
+
+import random
+
+
+if __name__ == "__main__":
+    count = 200000
+    page_size = 500
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, priority=lambda: random.randint(0, 9)))
+    backend.commit()
+
+    print(f"{'depth':>7} | {'OFFSET':>9} | {'keyset':>9}")
+
+    for depth in [0, 10000, 100000, 199000]:
+        def offset():
+            q = backend.session.query(orm.Event).order_by(orm.Event.start, orm.Event.id) \
+                .options(selectinload(orm.Event.attributes)).offset(depth).limit(page_size)
+            return [backend._event_from_entity(e) for e in q]
+
+        # the cursor a client would have gotten with the previous page
+        after = None
+        if depth:
+            row = backend.session.query(orm.Event.start, orm.Event.id).order_by(orm.Event.start, orm.Event.id) \
+                .offset(depth - 1).limit(1).one()
+            after = encode_cursor(('start', 'id'), row)
+
+        by_offset, t_offset = timed(offset, repeat=5)
+        by_keyset, t_keyset = timed(lambda: backend.get_events(limit=page_size, after=after), repeat=5)
+        assert [e.uuid for e in by_offset] == [e.uuid for e in by_keyset]
+
+        print(f'{depth:>7} | {t_offset * 1e3:>7.2f}ms | {t_keyset * 1e3:>7.2f}ms')
@@ -0,0 +1,38 @@
+from catalogue.orm import _Backend, orm
+from catalogue.filter import Match, Field, Attribute
+
+from bench_common import generate_events, timed
+
+from sqlalchemy import func
+
+import random
+import string
+
+
+if __name__ == "__main__":
+    count = 200000
+
+    authors = [''.join(random.choices(string.ascii_letters, k=8)) for _ in range(2000)] + ['Patrick', 'Pat']
+
+    backend = _Backend('sqlite://')
+    backend.insert_events(generate_events(count, authors,
+                                          note=lambda: ''.join(random.choices(string.ascii_lowercase + ' ', k=40))))
+    backend.commit()
+
+    print(f'{count} events, {"regex only":>10} | {"prefilter":>10}')
+    for pred in [Match(Field('author'), '^Pat'), Match(Field('author'), '^Pat.*k$'),
+                 Match(Attribute('note'), 'abc'), Match(Attribute('note'), '^ab+c')]:
+        # what was emitted before: the regex alone, evaluated by Python for every row
+        if isinstance(pred._lhs, Field):
+            regex_only = backend.session.query(func.count(orm.Event.id)).filter(
+                getattr(orm.Event, pred._lhs.value).regexp_match(pred._rhs))
+        else:
+            ea = orm.EventAttributes
+            regex_only = backend.session.query(func.count(ea.event_id)).filter(
+                ea.key == pred._lhs.value, ea.char_value.regexp_match(pred._rhs))
+
+        n_regex, t_regex = timed(regex_only.scalar, repeat=3)
+        n, t = timed(lambda: backend.count_events(pred), repeat=3)
+        assert n == n_regex
+
+        print(f'{str(pred):<34} {t_regex * 1e3:>8.1f}ms | {t * 1e3:>8.1f}ms ({n} events)')
@@ -0,0 +1,36 @@
+from catalogue.orm import _Backend
+from catalogue.filter import Search, Match, Attribute
+
+from bench_common import generate_events, timed
+
+import random
+import string
+
+vocabulary = [''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 10))) for _ in range(20000)] + \
+             ['reconnection', 'magnetopause', 'crossing']
+
+
+if __name__ == "__main__":
+    count = 1000000
+    events = generate_events(count, ['Patrick', 'Alexis'],
+                             note=lambda: ' '.join(random.choices(vocabulary, k=random.randint(5, 20))),
+                             priority=lambda: random.randint(0, 999))
+
+    backends = {}
+    for fulltext in [True, False]:
+        backend = _Backend('sqlite://', fulltext_index=fulltext)
+        _, t = timed(lambda: (backend.insert_events(events), backend.commit()), repeat=1)
+        backends[fulltext] = backend
+        print(f'insert {count} events {"with" if fulltext else "without"} full-text indexes: {t:.1f}s')
+
+    print(f'{count} events {"FTS5":>10} | {"LIKE+REGEXP":>12} | {"Match":>10}')
+    for words in ['reconnection', 'magnetopause crossing', 'crossing reconnection magnetopause']:
+        pred = Search(Attribute('note'), words)
+        regex = Match(Attribute('note'), ''.join(rf'(?=.*\b{w}\b)' for w in words.split()))
+
+        n, t = timed(lambda: backends[True].count_events(pred), repeat=3)
+        n_fallback, t_fallback = timed(lambda: backends[False].count_events(pred), repeat=1)
+        n_regex, t_regex = timed(lambda: backends[True].count_events(regex), repeat=1)
+        assert n == n_fallback == n_regex
+
+        print(f'{words:<34} {t * 1e3:>8.1f}ms | {t_fallback * 1e3:>10.1f}ms | {t_regex * 1e3:>8.1f}ms ({n} events)')
@@ -0,0 +1,53 @@
+from catalogue import Catalogue
+from catalogue.orm import _Backend
+from catalogue.filter import Comparison, Field, Attribute, All, Any, Match, Has, Not, Overlaps
+from catalogue.serialization import encode_predicate, decode_predicate
+
+from bench_common import timed, missions
+
+import pickle
+import random
+import datetime as dt
+
+import catalogue.api as api
+
+
+def random_predicate(depth=3):
+    if depth == 0 or random.random() < 0.3:
+        return random.choice([
+            lambda: Comparison(random.choice(['<', '>=', '==']), Attribute('priority'), random.randint(0, 9)),
+            lambda: Comparison('==', Attribute('mission'), random.choice(missions)),
+            lambda: Comparison('>', Field('start'), dt.datetime(2000 + random.randint(0, 20), 1, 1)),
+            lambda: Match(Field('author'), '^Pat'),
+            lambda: Has(Attribute('quality')),
+            lambda: Overlaps(dt.datetime(2010, 1, 1), dt.datetime(2011, 1, 1)),
+        ])()
+    if random.random() < 0.2:
+        return Not(random_predicate(depth - 1))
+    return random.choice([All, Any])(*[random_predicate(depth - 1) for _ in range(random.randint(2, 4))])
+
+
+if __name__ == "__main__":
+    count = 2000
+
+    predicates = [random_predicate() for _ in range(count)]
+
+    pickled, t_pickle = timed(lambda: [pickle.dumps(p, protocol=3) for p in predicates], repeat=5)
+    encoded, t_encode = timed(lambda: [encode_predicate(p) for p in predicates], repeat=5)
+    _, t_unpickle = timed(lambda: [pickle.loads(d) for d in pickled], repeat=5)
+    decoded, t_decode = timed(lambda: [decode_predicate(d) for d in encoded], repeat=5)
+    assert decoded == predicates
+
+    backend = _Backend('sqlite://')
+    api.save([Catalogue(f'catalogue {i}', 'Patrick', predicate=p) for i, p in enumerate(predicates)], backend)
+
+    catalogues, t_list = timed(backend.get_catalogues, repeat=5)
+    _, t_access = timed(lambda: [c.predicate for c in backend.get_catalogues()], repeat=5)
+
+    print(f'{count} predicates     {"bytes":>7} | {"encode":>8} | {"decode":>8}')
+    print(f'pickle             {sum(map(len, pickled)) / count:>7.0f} | {t_pickle * 1e3:>6.1f}ms | '
+          f'{t_unpickle * 1e3:>6.1f}ms')
+    print(f'encode_predicate() {sum(map(len, encoded)) / count:>7.0f} | {t_encode * 1e3:>6.1f}ms | '
+          f'{t_decode * 1e3:>6.1f}ms')
+    print(f'get_catalogues()                      {t_list * 1e3:>6.1f}ms')
+    print(f'get_catalogues() and every predicate  {t_access * 1e3:>6.1f}ms')